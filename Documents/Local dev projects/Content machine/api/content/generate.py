@@ -3,13 +3,22 @@ import json
 import os
 import sys
 from pathlib import Path
+from types import SimpleNamespace
 
 # Add the parent directory to Python path to import our modules
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from services.content_generator import ContentGenerator
+from services.registry import get_registry
 
 class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # Health check for the services kept warm in this container
+        try:
+            self.send_success_response(get_registry().health_check())
+        except Exception as e:
+            print(f"Error in health check: {str(e)}")
+            self.send_error_response(500, f"Internal server error: {str(e)}")
+    
     def do_POST(self):
         try:
             # Get request body
@@ -24,22 +33,38 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(400, "Missing client_id or topics")
                 return
             
-            # Initialize content generator
-            content_generator = ContentGenerator()
+            # There is no client store here, so the caller sends the client
+            # details (the 'client' that setup returned, or top-level fields)
+            client_data = request_data.get('client') or request_data
+            required_fields = ['name', 'niche', 'target_audience', 'tone_of_voice']
+            for field in required_fields:
+                if not client_data.get(field):
+                    self.send_error_response(400, f"Missing required client field: {field}")
+                    return
+            client = SimpleNamespace(
+                id=client_id,
+                name=client_data['name'],
+                niche=client_data['niche'],
+                target_audience=client_data['target_audience'],
+                tone_of_voice=client_data['tone_of_voice'],
+                goals=client_data.get('goals', ''),
+                model_routes=client_data.get('model_routes')
+            )
+            
+            # Reuse the content generator kept warm across invocations of this container
+            content_generator = get_registry().get('content_generator')
             
-            # Generate content for each topic
+            # Generate content for the top 5 topics concurrently
             generated_content = []
-            for topic in topics[:5]:  # Limit to top 5 topics
-                try:
-                    carousel_post = content_generator.generate_carousel_post(topic, client_id)
-                    generated_content.append({
-                        'topic': topic,
-                        'carousel_post': carousel_post
-                    })
-                except Exception as e:
-                    print(f"Error generating content for topic {topic.get('title', 'Unknown')}: {str(e)}")
-                    # Continue with other topics
+            carousel_posts = content_generator.generate_carousel_posts(topics[:5], client)
+            for topic, carousel_post in zip(topics[:5], carousel_posts):
+                # Failed topics are skipped, continue with the others
+                if carousel_post is None:
                     continue
+                generated_content.append({
+                    'topic': topic,
+                    'carousel_post': carousel_post
+                })
             
             self.send_success_response({
                 'generated_content': generated_content,
@@ -55,7 +80,7 @@ class handler(BaseHTTPRequestHandler):
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
         self.wfile.write(json.dumps(data).encode())
@@ -70,6 +95,6 @@ class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
@@ -7,11 +7,19 @@ from pathlib import Path
 # Add the parent directory to Python path to import our modules
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
-from services.trend_analyzer import TrendAnalyzer
-from services.news_collector import NewsCollector
-from services.social_collector import SocialCollector
+from services.collection_orchestrator import CollectionOrchestrator
+from services.topic_merger import TopicMerger
+from services.registry import get_registry
 
 class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # Health check for the services kept warm in this container
+        try:
+            self.send_success_response(get_registry().health_check())
+        except Exception as e:
+            print(f"Error in health check: {str(e)}")
+            self.send_error_response(500, f"Internal server error: {str(e)}")
+    
     def do_POST(self):
         try:
             # Get request body
@@ -26,18 +34,18 @@ class handler(BaseHTTPRequestHandler):
                 self.send_error_response(400, "Missing client_id or niche")
                 return
             
-            # Initialize services
-            news_collector = NewsCollector()
-            social_collector = SocialCollector()
-            trend_analyzer = TrendAnalyzer()
+            # Reuse services kept warm across invocations of this container
+            services = get_registry()
+            news_collector = services.get('news_collector')
+            social_collector = services.get('social_collector')
+            trend_analyzer = services.get('trend_analyzer')
             
-            # Collect trending topics
-            news_topics = news_collector.get_trending_topics(niche)
-            social_topics = social_collector.get_trending_topics(niche)
+            # Collect trending topics from all sources concurrently
+            orchestrator = CollectionOrchestrator([news_collector, social_collector])
+            all_topics = orchestrator.collect(niche)
             
-            # Combine and deduplicate topics
-            all_topics = news_topics + social_topics
-            unique_topics = self.deduplicate_topics(all_topics)
+            # Merge the same story reported by several sources
+            unique_topics, merge_report = TopicMerger().merge(all_topics)
             
             # Analyze topics with AI
             analyzed_topics = trend_analyzer.analyze_topics(unique_topics, niche)
@@ -51,6 +59,7 @@ class handler(BaseHTTPRequestHandler):
             self.send_success_response({
                 'topics': top_topics,
                 'total_found': len(analyzed_topics),
+                'deduplication': merge_report,
                 'client_id': client_id,
                 'niche': niche
             })
@@ -59,24 +68,11 @@ class handler(BaseHTTPRequestHandler):
             print(f"Error in trend analysis: {str(e)}")
             self.send_error_response(500, f"Internal server error: {str(e)}")
     
-    def deduplicate_topics(self, topics):
-        """Remove duplicate topics based on title similarity"""
-        seen_titles = set()
-        unique_topics = []
-        
-        for topic in topics:
-            title = topic.get('title', '').lower().strip()
-            if title and title not in seen_titles:
-                seen_titles.add(title)
-                unique_topics.append(topic)
-        
-        return unique_topics
-    
     def send_success_response(self, data):
         self.send_response(200)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
         self.wfile.write(json.dumps(data).encode())
@@ -91,6 +87,6 @@ class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
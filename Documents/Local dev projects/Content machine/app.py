@@ -1,7 +1,7 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context
 from flask_cors import CORS
-from flask_sqlalchemy import SQLAlchemy
 import os
+import time
 from dotenv import load_dotenv
 import json
 from datetime import datetime, timedelta
@@ -10,14 +10,30 @@ from services.trend_analyzer import TrendAnalyzer
 from services.content_generator import ContentGenerator
 from services.news_collector import NewsCollector
 from services.social_collector import SocialCollector
-from models.client import Client
+from services.collection_orchestrator import CollectionOrchestrator
+from services.topic_merger import TopicMerger
+from services.job_queue import JobQueue, FINISHED_STATUSES
+from services.model_router import validate_routes
+from services.persistence import BulkWriter
+from services.pagination import CursorError, keyset_page, parse_page_size
+from services.fast_json import FastJSONProvider
+from services.retention import TopicRetention
+from services.niche_pool import NicheTopicPool
+from models import db
+from models.client import Client, upgrade_client_columns
 from models.trending_topic import TrendingTopic
-from models.generated_content import GeneratedContent
+from models.generated_content import GeneratedContent, upgrade_topic_link
+from models.niche_topic import NicheTopic, upgrade_niche_topic_columns
+from models.client_topic_score import ClientTopicScore
+from models.job import Job
+from models.topic_rollup import TopicRollup
+from models.types import upgrade_json_columns
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
 # Database configuration - use PostgreSQL in production, SQLite in development
@@ -29,7 +45,7 @@ else:
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 # Initialize extensions
-db = SQLAlchemy(app)
+db.init_app(app)
 CORS(app)
 
 # Initialize OpenAI
@@ -40,6 +56,105 @@ trend_analyzer = TrendAnalyzer()
 content_generator = ContentGenerator()
 news_collector = NewsCollector()
 social_collector = SocialCollector()
+collection_orchestrator = CollectionOrchestrator([news_collector, social_collector])
+topic_merger = TopicMerger()
+bulk_writer = BulkWriter(db, NicheTopic, ClientTopicScore, GeneratedContent)
+niche_pool = NicheTopicPool(db, NicheTopic, bulk_writer)
+topic_retention = TopicRetention(db, NicheTopic, ClientTopicScore, TopicRollup, GeneratedContent,
+                                 legacy_topic_model=TrendingTopic, client_model=Client)
+
+def collect_niche_topics(niche, client):
+    """Collect, merge and analyze a niche's trending topics, returning them ranked and whether scoring fell back"""
+    # Collect trending topics from all sources concurrently
+    all_topics = collection_orchestrator.collect(niche)
+    
+    # Merge the same story reported by several sources before paying for analysis
+    unique_topics, merge_report = topic_merger.merge(all_topics)
+    print(f"Merged {merge_report['input_topics']} topics into {merge_report['merged_topics']}, "
+          f"saving ~{merge_report['prompt_tokens_saved']} prompt tokens")
+    
+    # Analyze combined topics, on the models the client's routes pick
+    return trend_analyzer.analyze_topics_with_status(unique_topics, niche, client)
+
+def run_trend_analysis(client, niche, commit=True):
+    """
+    Rank the niche's shared trending topics for a client and store the client's scores
+    
+    The niche's topics are collected and analyzed once per refresh window
+    and shared by every client in it. With commit=False the client's scores
+    are left in the session for the caller's transaction, so a job stores
+    them and its status together.
+    """
+    scoring_model = trend_analyzer.router.model_for('topic_scoring', client)
+    pool = niche_pool.get_topics(niche, scoring_model,
+                                 lambda pool_niche: collect_niche_topics(pool_niche, client))
+    analyzed_topics = niche_pool.score_for_client(client, pool)
+    
+    # Store the client's scores for its top 10 topics in one multi-row insert
+    bulk_writer.save_client_scores(client.id, analyzed_topics[:10])
+    if commit:
+        db.session.commit()
+    return analyzed_topics
+
+def run_content_generation(client, topics, commit=True):
+    """Generate and store carousel posts for a client's top 5 topics, returning the posts"""
+    # Generate content for the top 5 topics concurrently
+    posts = content_generator.generate_carousel_posts(topics[:5], client)
+    generated = [(topic, post_content) for topic, post_content in zip(topics[:5], posts)
+                 if post_content is not None]
+    
+    # Store generated content in one multi-row insert
+    bulk_writer.save_generated_content(client.id, generated)
+    if commit:
+        db.session.commit()
+    return [post_content for _, post_content in generated]
+
+def trend_analysis_job(payload):
+    """Job handler for trend analysis"""
+    client = db.session.get(Client, payload['client_id'])
+    if not client:
+        raise LookupError('Client not found')
+    # The job queue commits the rows along with the job's status
+    analyzed_topics = run_trend_analysis(client, payload['niche'], commit=False)
+    return {'topics': analyzed_topics[:5]}
+
+def content_generation_job(payload):
+    """Job handler for content generation"""
+    client = db.session.get(Client, payload['client_id'])
+    if not client:
+        raise LookupError('Client not found')
+    return {'posts': run_content_generation(client, payload['topics'], commit=False)}
+
+def topic_retention_job(payload):
+    """Job handler for rolling up and pruning topic history"""
+    return topic_retention.run()
+
+# Background jobs keep long pipeline runs off the request threads
+job_queue = JobQueue(app, db, Job)
+job_queue.register('trend_analysis', trend_analysis_job)
+job_queue.register('content_generation', content_generation_job)
+job_queue.register('topic_retention', topic_retention_job)
+
+@app.cli.command('topic-retention')
+def topic_retention_command():
+    """Roll up topic history and prune old rows, e.g. from a daily cron"""
+    result = topic_retention.run()
+    db.session.commit()
+    print(json.dumps(result))
+
+with app.app_context():
+    db.create_all()
+    upgrade_client_columns(db)
+    upgrade_niche_topic_columns(db)
+    upgrade_json_columns(db, TrendingTopic, GeneratedContent)
+    upgrade_topic_link(db)
+    # create_all skips tables that already exist, so add newer indexes to older databases
+    for index in (*TrendingTopic.__table__.indexes, *GeneratedContent.__table__.indexes):
+        index.create(db.engine, checkfirst=True)
+    # Pick up jobs that were queued or interrupted before a restart
+    job_queue.recover()
+    # and keep picking up jobs whose worker stops responding while the app runs
+    job_queue.start_sweeper()
 
 @app.route('/')
 def index():
@@ -56,6 +171,14 @@ def setup_client():
         if not all(field in data for field in required_fields):
             return jsonify({'error': 'Missing required fields'}), 400
         
+        # Optional per-client model routing rules, e.g. {"topic_scoring": "local"}
+        model_routes = None
+        if data.get('model_routes'):
+            try:
+                model_routes = json.dumps(validate_routes(data['model_routes']))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+        
         # Create new client
         client = Client(
             name=data['name'],
@@ -63,6 +186,7 @@ def setup_client():
             target_audience=data['target_audience'],
             tone_of_voice=data['tone_of_voice'],
             goals=data['goals'],
+            model_routes=model_routes,
             created_at=datetime.utcnow()
         )
         
@@ -88,29 +212,11 @@ def analyze_trends():
         if not client_id or not niche:
             return jsonify({'error': 'Client ID and niche are required'}), 400
         
-        # Collect trending topics from multiple sources
-        news_topics = news_collector.get_trending_topics(niche)
-        social_topics = social_collector.get_trending_topics(niche)
-        
-        # Combine and analyze topics
-        all_topics = news_topics + social_topics
-        analyzed_topics = trend_analyzer.analyze_topics(all_topics, niche)
-        
-        # Store trending topics
-        for topic in analyzed_topics[:10]:  # Top 10 topics
-            trending_topic = TrendingTopic(
-                client_id=client_id,
-                title=topic['title'],
-                description=topic['description'],
-                source=topic['source'],
-                virality_score=topic['virality_score'],
-                relevance_score=topic['relevance_score'],
-                overall_score=topic['overall_score'],
-                created_at=datetime.utcnow()
-            )
-            db.session.add(trending_topic)
+        client = db.session.get(Client, client_id)
+        if not client:
+            return jsonify({'error': 'Client not found'}), 404
         
-        db.session.commit()
+        analyzed_topics = run_trend_analysis(client, niche)
         
         return jsonify({
             'message': 'Trend analysis completed',
@@ -136,27 +242,7 @@ def generate_content():
         if not client:
             return jsonify({'error': 'Client not found'}), 404
         
-        # Generate content for each topic
-        generated_posts = []
-        for topic in topics[:5]:  # Generate for top 5 topics
-            post_content = content_generator.generate_carousel_post(
-                topic=topic,
-                client=client
-            )
-            
-            # Store generated content
-            generated_content = GeneratedContent(
-                client_id=client_id,
-                topic_id=topic.get('id'),
-                content_type='instagram_carousel',
-                content=json.dumps(post_content),
-                created_at=datetime.utcnow()
-            )
-            db.session.add(generated_content)
-            
-            generated_posts.append(post_content)
-        
-        db.session.commit()
+        generated_posts = run_content_generation(client, topics)
         
         return jsonify({
             'message': 'Content generation completed',
@@ -166,6 +252,172 @@ def generate_content():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/content/generate/stream', methods=['POST'])
+def generate_content_stream():
+    """Stream Instagram carousel posts as NDJSON lines or SSE events as each one is ready"""
+    try:
+        data = request.json
+        client_id = data.get('client_id')
+        topics = data.get('topics', [])
+        
+        if not client_id or not topics:
+            return jsonify({'error': 'Client ID and topics are required'}), 400
+        
+        # Get client details
+        client = Client.query.get(client_id)
+        if not client:
+            return jsonify({'error': 'Client not found'}), 404
+        
+        use_sse = (request.args.get('format') == 'sse' or
+                   'text/event-stream' in request.headers.get('Accept', ''))
+        
+        def format_event(event_type, payload):
+            if use_sse:
+                return f"event: {event_type}\ndata: {app.json.dumps(payload)}\n\n"
+            payload = dict(payload, event=event_type)
+            return app.json.dumps(payload) + "\n"
+        
+        def generate():
+            total_generated = 0
+            for index, post_content in content_generator.iter_carousel_posts(topics[:5], client):
+                if post_content is None:
+                    yield format_event('error', {
+                        'index': index,
+                        'error': 'Content generation failed for this topic'
+                    })
+                    continue
+                
+                # Persist each post as soon as it arrives
+                generated_content = GeneratedContent(
+                    client_id=client_id,
+                    topic_id=topics[index].get('id'),
+                    content_type='instagram_carousel',
+                    content=post_content,
+                    created_at=datetime.utcnow()
+                )
+                db.session.add(generated_content)
+                db.session.commit()
+                total_generated += 1
+                
+                yield format_event('post', {
+                    'index': index,
+                    'content_id': generated_content.id,
+                    'post': post_content
+                })
+            
+            yield format_event('done', {'total_generated': total_generated})
+        
+        mimetype = 'text/event-stream' if use_sse else 'application/x-ndjson'
+        return Response(stream_with_context(generate()), mimetype=mimetype,
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/trends/analyze', methods=['POST'])
+def submit_trend_analysis_job():
+    """Queue trend analysis for a client and return the job id immediately"""
+    try:
+        data = request.json
+        client_id = data.get('client_id')
+        niche = data.get('niche')
+        
+        if not client_id or not niche:
+            return jsonify({'error': 'Client ID and niche are required'}), 400
+        
+        if not db.session.get(Client, client_id):
+            return jsonify({'error': 'Client not found'}), 404
+        
+        job_id = job_queue.submit('trend_analysis', {'client_id': client_id, 'niche': niche})
+        
+        return jsonify({
+            'message': 'Trend analysis queued',
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/content/generate', methods=['POST'])
+def submit_content_generation_job():
+    """Queue carousel generation for a client and return the job id immediately"""
+    try:
+        data = request.json
+        client_id = data.get('client_id')
+        topics = data.get('topics', [])
+        
+        if not client_id or not topics:
+            return jsonify({'error': 'Client ID and topics are required'}), 400
+        
+        if not db.session.get(Client, client_id):
+            return jsonify({'error': 'Client not found'}), 404
+        
+        job_id = job_queue.submit('content_generation', {'client_id': client_id, 'topics': topics})
+        
+        return jsonify({
+            'message': 'Content generation queued',
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/retention', methods=['POST'])
+def submit_topic_retention_job():
+    """Queue a topic history rollup and prune"""
+    try:
+        job_id = job_queue.submit('topic_retention', {})
+        
+        return jsonify({
+            'message': 'Topic retention queued',
+            'job_id': job_id,
+            'status_url': f'/api/jobs/{job_id}'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get the status and result of a background job"""
+    try:
+        job = job_queue.get(job_id)
+        if not job:
+            return jsonify({'error': 'Job not found'}), 404
+        
+        return jsonify(job), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def stream_job(job_id):
+    """Stream job status changes as SSE events until the job finishes"""
+    try:
+        if not job_queue.get(job_id):
+            return jsonify({'error': 'Job not found'}), 404
+        
+        poll_interval = float(os.getenv('JOB_STREAM_POLL_SECONDS', '1'))
+        
+        def generate():
+            last_status = None
+            while True:
+                job = job_queue.get(job_id)
+                if job['status'] != last_status:
+                    last_status = job['status']
+                    yield f"event: status\ndata: {json.dumps(job)}\n\n"
+                if job['status'] in FINISHED_STATUSES:
+                    break
+                time.sleep(poll_interval)
+        
+        return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/client/<int:client_id>', methods=['GET'])
 def get_client(client_id):
     """Get client details"""
@@ -181,31 +433,65 @@ def get_client(client_id):
 
 @app.route('/api/trends/<int:client_id>', methods=['GET'])
 def get_client_trends(client_id):
-    """Get trending topics for a specific client"""
+    """Get a page of a client's trending topics, highest score first"""
     try:
-        trends = TrendingTopic.query.filter_by(client_id=client_id).order_by(
-            TrendingTopic.overall_score.desc()
-        ).limit(10).all()
+        limit = parse_page_size(request.args.get('limit'), 10)
+        trends, next_cursor = keyset_page(
+            ClientTopicScore.query.filter_by(client_id=client_id),
+            ClientTopicScore.overall_score, ClientTopicScore.topic_id,
+            request.args.get('cursor'), limit
+        )
         
-        return jsonify([trend.to_dict() for trend in trends]), 200
+        return paginated_response([trend.to_dict() for trend in trends], next_cursor)
+        
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/trends/<int:client_id>/history', methods=['GET'])
+def get_client_trend_history(client_id):
+    """Get daily trend rollups for a client's niche over the last N days"""
+    try:
+        client = db.session.get(Client, client_id)
+        if not client:
+            return jsonify({'error': 'Client not found'}), 404
+        
+        days = request.args.get('days', '7')
+        if not days.isdigit() or not 1 <= int(days) <= 366:
+            return jsonify({'error': 'days must be between 1 and 366'}), 400
+        
+        return jsonify(topic_retention.summary(client.niche, int(days))), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/content/<int:client_id>', methods=['GET'])
 def get_client_content(client_id):
-    """Get generated content for a specific client"""
+    """Get a page of a client's generated content, newest first"""
     try:
-        content = GeneratedContent.query.filter_by(client_id=client_id).order_by(
-            GeneratedContent.created_at.desc()
-        ).limit(20).all()
+        limit = parse_page_size(request.args.get('limit'), 20)
+        content, next_cursor = keyset_page(
+            GeneratedContent.query.filter_by(client_id=client_id),
+            GeneratedContent.created_at, GeneratedContent.id,
+            request.args.get('cursor'), limit
+        )
         
-        return jsonify([item.to_dict() for item in content]), 200
+        return paginated_response([item.to_dict() for item in content], next_cursor)
         
+    except CursorError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def paginated_response(items, next_cursor):
+    """A page of items, with the next page's cursor in the X-Next-Cursor header"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = (f'<{request.base_url}?cursor={next_cursor}'
+                                    f'&limit={len(items)}>; rel="next"')
+    return response, 200
+
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,100 @@
+"""
+Benchmark MinHash/LSH topic deduplication against the pairwise implementation
+
+Generates synthetic news-style titles, a share of which are near-duplicate
+rewrites of earlier ones, and deduplicates them with both the previous
+O(n^2) word-overlap loop and NearDuplicateDetector. Reports the time each
+takes and whether they keep the same titles.
+
+Usage:
+    python benchmarks/bench_dedup.py --titles 10000 --threshold 0.8
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path to import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.dedup import NearDuplicateDetector
+
+VOCABULARY_SIZE = 5000
+
+
+def generate_titles(count, duplicate_ratio, seed):
+    """Build titles where duplicate_ratio of them lightly rewrite an earlier title"""
+    generator = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(VOCABULARY_SIZE)]
+    titles = []
+    for _ in range(count):
+        if titles and generator.random() < duplicate_ratio:
+            words = generator.choice(titles).split()
+            # Swap out one word so the copy is near, not exact
+            words[generator.randrange(len(words))] = generator.choice(vocabulary)
+            titles.append(' '.join(words))
+        else:
+            titles.append(' '.join(generator.sample(vocabulary, generator.randint(8, 14))))
+    return [{'title': title} for title in titles]
+
+
+def legacy_deduplicate(topics, threshold):
+    """The pairwise implementation previously used by the collectors"""
+    def similarity_score(title1, title2):
+        words1 = set(title1.split())
+        words2 = set(title2.split())
+        if not words1 or not words2:
+            return 0.0
+        return len(words1.intersection(words2)) / len(words1.union(words2))
+
+    unique_topics = []
+    seen_titles = set()
+    for topic in topics:
+        title = topic.get('title', '').lower()
+        is_duplicate = False
+        for seen_title in seen_titles:
+            if similarity_score(title, seen_title) > threshold:
+                is_duplicate = True
+                break
+        if not is_duplicate:
+            unique_topics.append(topic)
+            seen_titles.add(title)
+    return unique_topics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--duplicate-ratio', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the MinHash implementation')
+    args = parser.parse_args()
+
+    topics = generate_titles(args.titles, args.duplicate_ratio, args.seed)
+    print(f"Deduplicating {len(topics)} titles at Jaccard > {args.threshold}")
+
+    detector = NearDuplicateDetector(args.threshold)
+    started = time.perf_counter()
+    minhash_topics = detector.deduplicate(topics)
+    minhash_seconds = time.perf_counter() - started
+    print(f"minhash  {minhash_seconds:8.3f}s  kept={len(minhash_topics)}")
+
+    if args.skip_legacy:
+        return
+
+    started = time.perf_counter()
+    legacy_topics = legacy_deduplicate(topics, args.threshold)
+    legacy_seconds = time.perf_counter() - started
+    print(f"pairwise {legacy_seconds:8.3f}s  kept={len(legacy_topics)}")
+
+    legacy_titles = {topic['title'] for topic in legacy_topics}
+    minhash_titles = {topic['title'] for topic in minhash_topics}
+    print(f"speedup {legacy_seconds / minhash_seconds:.1f}x, "
+          f"missed duplicates={len(minhash_titles - legacy_titles)}, "
+          f"extra removals={len(legacy_titles - minhash_titles)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Measure payload size and CPU per request for the generated content history endpoint
+
+A page of carousel posts is loaded from SQLite and returned three ways:
+
+- legacy: content kept as a JSON string inside the response, as to_dict
+  used to return it, encoded by Flask's default provider
+- decoded: content decoded by JSONColumn, encoded by Flask's default provider
+- decoded+orjson: the same through FastJSONProvider, as the app now serves it
+
+The legacy payload is what the frontend had to parse twice. CPU is process
+time per request, including the query, decoding and encoding.
+
+Usage:
+    python benchmarks/bench_json_columns.py --rows 2000 --page 20 --requests 300
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the project root to Python path to import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from models import db
+from models.client import Client
+from models.niche_topic import NicheTopic
+from models.client_topic_score import ClientTopicScore
+from models.generated_content import GeneratedContent
+from services.fast_json import FastJSONProvider, orjson
+from services.persistence import BulkWriter
+
+
+def make_post(index):
+    slides = [
+        {'slide_number': number, 'title': f'Slide {number}: training tip {index}',
+         'content': 'Short, punchy "advice" for busy people who want to train smarter ' * 2,
+         'call_to_action': 'Save this post for later', 'hashtags': ['#fitness', '#training', '#health']}
+        for number in range(1, 7)
+    ]
+    return {'main_title': f'Carousel {index}', 'slides': slides,
+            'caption': 'Which tip are you trying first? Tell us below!', 'overall_theme': 'Training',
+            'metadata': {'topic_title': f'Trend {index}', 'topic_score': 7.5}}
+
+
+def legacy_dict(item):
+    """The row as to_dict returned it before JSONColumn, content as a string"""
+    data = item.to_dict()
+    data['content'] = item.content_json
+    return data
+
+
+def measure(app, client, url, requests):
+    response = client.get(url)
+    started = time.process_time()
+    for _ in range(requests):
+        client.get(url)
+    cpu = (time.process_time() - started) / requests
+    return len(response.data), cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=2000, help='generated posts stored for the client')
+    parser.add_argument('--page', type=int, default=20, help='posts per response')
+    parser.add_argument('--requests', type=int, default=300, help='requests timed per variant')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        @app.route('/content/<variant>')
+        def content(variant):
+            items = GeneratedContent.query.filter_by(client_id=1).order_by(
+                GeneratedContent.created_at.desc(), GeneratedContent.id.desc()
+            ).limit(args.page).all()
+            if variant == 'legacy':
+                return jsonify([legacy_dict(item) for item in items])
+            return jsonify([item.to_dict() for item in items])
+
+        with app.app_context():
+            db.create_all()
+            db.session.add(Client(name='Bench Co', niche='fitness', target_audience='gym goers',
+                                  tone_of_voice='friendly', goals='grow followers'))
+            writer = BulkWriter(db, NicheTopic, ClientTopicScore, GeneratedContent)
+            writer.save_generated_content(1, [({}, make_post(index)) for index in range(args.rows)])
+            db.session.commit()
+
+        client = app.test_client()
+        print(f"{args.page} posts per response, orjson {'installed' if orjson else 'not installed'}")
+        print(f"{'variant':<16} {'bytes':>8} {'CPU ms/req':>11}")
+        results = {}
+        for name, provider, variant in (('legacy', DefaultJSONProvider, 'legacy'),
+                                        ('decoded', DefaultJSONProvider, 'decoded'),
+                                        ('decoded+orjson', FastJSONProvider, 'decoded')):
+            app.json = provider(app)
+            size, cpu = measure(app, client, f'/content/{variant}', args.requests)
+            results[name] = (size, cpu)
+            print(f"{name:<16} {size:>8} {cpu * 1000:>11.3f}")
+
+        legacy_size, legacy_cpu = results['legacy']
+        size, cpu = results['decoded+orjson']
+        print(f"\ndecoded+orjson vs legacy: {size / legacy_size:.2f}x bytes, {cpu / legacy_cpu:.2f}x CPU")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark latency and token cost per model route against a fake OpenAI server
+
+A local HTTP server speaks the chat completions API, including streamed
+function calls, and answers after a per-model delay. The same trend
+analysis and carousel generation run is repeated under several routing
+configurations, and the router's per-route stats are printed for each.
+
+Usage:
+    python benchmarks/bench_model_routes.py --topics 40 --posts 3
+    python benchmarks/bench_model_routes.py --latency gpt-4=0.02,gpt-3.5-turbo=0.004
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the project root to Python path to import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+# Every call must reach the fake server, not be shared or cached away
+os.environ['OPENAI_COALESCE'] = 'false'
+os.environ['STRUCTURED_OUTPUT'] = 'true'
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+
+import openai
+
+from services import trend_analyzer as trend_analyzer_module
+from services.trend_analyzer import TrendAnalyzer
+from services.content_generator import ContentGenerator
+from services.model_router import ModelRouter
+
+SCENARIOS = {
+    'all-large': {'topic_scoring': 'gpt-4', 'carousel': 'gpt-4', 'slide_repair': 'gpt-4'},
+    'tiered': {'topic_scoring': 'gpt-3.5-turbo', 'carousel': 'gpt-4', 'slide_repair': 'gpt-3.5-turbo'},
+    'local-scoring': {'topic_scoring': 'local', 'carousel': 'gpt-4', 'slide_repair': 'gpt-3.5-turbo'}
+}
+
+# Seconds per output chunk of ~20 characters, roughly the relative speed of each model
+DEFAULT_LATENCY = 'gpt-4=0.02,gpt-3.5-turbo=0.004'
+
+_TOPIC_LINE = re.compile(r'^(\d+)\. Title: (.*)$', re.MULTILINE)
+
+
+def fake_arguments(function_name, messages):
+    """Build plausible function arguments for a request"""
+    if function_name == 'submit_topic_scores':
+        topics = []
+        for number, title in _TOPIC_LINE.findall(messages[-1]['content']):
+            score = (int(number) * 7) % 10
+            topics.append({
+                'topic_number': int(number), 'title': title, 'virality_score': score,
+                'relevance_score': 10 - score, 'reasoning': 'Benchmark score',
+                'keywords': ['benchmark'], 'sentiment': 'neutral'
+            })
+        return {'topics': topics}
+
+    slide = {'title': 'Benchmark slide', 'content': 'Benchmark slide content ' * 4,
+             'call_to_action': 'Save this post', 'hashtags': ['#bench', '#mark', '#ai']}
+    slides = [dict(slide, slide_number=number) for number in range(1, 7)]
+    if function_name == 'submit_carousel_slides':
+        return {'slides': slides[:1]}
+    return {'main_title': 'Benchmark carousel', 'slides': slides,
+            'caption': 'Benchmark caption', 'overall_theme': 'Benchmarking'}
+
+
+def make_handler(latency):
+    class FakeOpenAIHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            model = body['model']
+            function_name = body['tool_choice']['function']['name']
+            arguments = json.dumps(fake_arguments(function_name, body['messages']))
+            pieces = [arguments[i:i + 20] for i in range(0, len(arguments), 20)]
+            delay = latency.get(model, max(latency.values()))
+
+            if not body.get('stream'):
+                time.sleep(delay * len(pieces))
+                self._send_json({
+                    'id': 'chatcmpl-bench', 'object': 'chat.completion', 'created': int(time.time()),
+                    'model': model,
+                    'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {
+                        'role': 'assistant', 'content': None,
+                        'tool_calls': [{'id': 'call_bench', 'type': 'function',
+                                        'function': {'name': function_name, 'arguments': arguments}}]
+                    }}]
+                })
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            for index, piece in enumerate(pieces):
+                time.sleep(delay)
+                tool_call = {'index': 0, 'function': {'arguments': piece}}
+                if index == 0:
+                    tool_call.update({'id': 'call_bench', 'type': 'function'})
+                    tool_call['function']['name'] = function_name
+                self._send_event({
+                    'id': 'chatcmpl-bench', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                    'model': model,
+                    'choices': [{'index': 0, 'finish_reason': None, 'delta': {'tool_calls': [tool_call]}}]
+                })
+            self.wfile.write(b'data: [DONE]\n\n')
+
+        def _send_json(self, payload):
+            data = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_event(self, payload):
+            self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+            self.wfile.flush()
+
+    return FakeOpenAIHandler
+
+
+def make_topics(count):
+    return [
+        {
+            'title': f'Fitness trend {index}: new training method number {index}',
+            'description': f'Coaches discuss training method {index} and recovery.',
+            'source': ('reddit', 'twitter', 'gnews')[index % 3],
+            'engagement_score': 50 * index,
+            'url': f'https://example.com/fitness/{index}'
+        }
+        for index in range(count)
+    ]
+
+
+def run_scenario(name, routes, base_url, topics, posts):
+    """Run one analysis and generation pass under a routing configuration"""
+    # Start cold so every scenario pays for its own scoring
+    trend_analyzer_module._analysis_cache.clear()
+    trend_analyzer_module._topic_scores.clear()
+
+    router = ModelRouter(routes)
+    client = openai.OpenAI(api_key='sk-benchmark', base_url=base_url)
+    analyzer = TrendAnalyzer(router)
+    analyzer.openai_client = client
+    generator = ContentGenerator(router)
+    generator.openai_client = client
+
+    customer = SimpleNamespace(name='Bench Co', niche='fitness', target_audience='gym goers',
+                               tone_of_voice='friendly', goals='grow followers')
+
+    started = time.perf_counter()
+    analyzed = analyzer.analyze_topics(topics, 'fitness')
+    generated = generator.generate_carousel_posts(analyzed[:posts], customer)
+    elapsed = time.perf_counter() - started
+
+    stats = router.get_stats()
+    print(f"\n{name}: {elapsed:.2f}s total, {len(analyzed)} topics scored, "
+          f"{sum(post is not None for post in generated)} posts")
+    print(f"  {'route':<30} {'calls':>5} {'mean s':>8} {'prompt tok':>10} {'compl tok':>10} {'cost $':>9}")
+    for route, values in stats.items():
+        print(f"  {route:<30} {values['calls']:>5} {values['mean_seconds']:>8.3f} "
+              f"{values['prompt_tokens']:>10} {values['completion_tokens']:>10} {values['cost_usd']:>9.4f}")
+    total_cost = sum(values['cost_usd'] for values in stats.values())
+    print(f"  {'total':<30} {'':>5} {'':>8} {'':>10} {'':>10} {total_cost:>9.4f}")
+    return elapsed, total_cost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--topics', type=int, default=40, help='topics to analyze')
+    parser.add_argument('--posts', type=int, default=3, help='carousel posts to generate')
+    parser.add_argument('--latency', default=DEFAULT_LATENCY,
+                        help='per-model seconds per streamed chunk, e.g. gpt-4=0.02,gpt-3.5-turbo=0.004')
+    args = parser.parse_args()
+
+    latency = {}
+    for pair in args.latency.split(','):
+        model, seconds = pair.split('=')
+        latency[model.strip()] = float(seconds)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/v1'
+
+    topics = make_topics(args.topics)
+    results = {}
+    try:
+        for name, routes in SCENARIOS.items():
+            results[name] = run_scenario(name, routes, base_url, topics, args.posts)
+    finally:
+        server.shutdown()
+
+    baseline_seconds, baseline_cost = results['all-large']
+    print('\nvs all-large:')
+    for name, (seconds, cost) in results.items():
+        print(f"  {name:<14} {seconds / baseline_seconds:6.2f}x time  "
+              f"{(cost / baseline_cost if baseline_cost else 0):6.2f}x cost")
+
+
+if __name__ == '__main__':
+    main()
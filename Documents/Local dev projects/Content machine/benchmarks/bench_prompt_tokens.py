@@ -0,0 +1,130 @@
+"""
+Measure prompt tokens per carousel for the legacy and compiled prompt layouts
+
+Legacy mode rebuilds the indented system message and a user prompt that
+repeats the client block for every topic, as ContentGenerator used to.
+Compiled mode sends the cached per-client system message as a shared
+prefix and only the topic in the user message. Batched mode sends that
+prefix once for several topics.
+
+Usage:
+    python benchmarks/bench_prompt_tokens.py --topics 5 --batch-size 5
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the project root to Python path to import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+os.environ.setdefault('OPENAI_API_KEY', 'sk-benchmark')
+
+from services.content_generator import ContentGenerator
+from services.token_utils import estimate_tokens
+
+LEGACY_SYSTEM_PROMPT = """You are an expert social media content creator specializing in Instagram carousel posts.
+                        Create engaging, informative carousel content that follows Instagram best practices.
+
+                        Return your response as a JSON object with:
+                        - main_title: Catchy title for the carousel
+                        - slides: Array of 5-7 slides, each containing:
+                          - slide_number: Slide number (1, 2, 3, etc.)
+                          - title: Slide title (max 60 characters)
+                          - content: Main content text (max 150 characters)
+                          - call_to_action: Action item or tip
+                          - hashtags: Array of 3-5 relevant hashtags
+                        - caption: Engaging caption for the post
+                        - overall_theme: Brief description of the carousel theme
+
+                        Make content engaging, educational, and aligned with the client's tone of voice."""
+
+
+def legacy_user_prompt(topic, client):
+    """The per-topic prompt ContentGenerator built before templates were compiled"""
+    return f"""
+        Create an Instagram carousel post for the following trending topic:
+
+        TOPIC: {topic.get('title', '')}
+        DESCRIPTION: {topic.get('description', '')}
+        VIRALITY SCORE: {topic.get('virality_score', 0)}/10
+        RELEVANCE SCORE: {topic.get('relevance_score', 0)}/10
+
+        CLIENT DETAILS:
+        - Name: {client.name}
+        - Niche: {client.niche}
+        - Target Audience: {client.target_audience}
+        - Tone of Voice: {client.tone_of_voice}
+        - Goals: {client.goals}
+
+        REQUIREMENTS:
+        1. Create 5-7 engaging slides that educate and inform
+        2. Use the client's tone of voice consistently
+        3. Include actionable tips and insights
+        4. Make it shareable and engaging
+        5. Use relevant hashtags for discoverability
+        6. Include a compelling caption that encourages engagement
+
+        The carousel should provide value to the target audience while leveraging the trending topic's momentum.
+        """
+
+
+def make_topics(count):
+    return [
+        {
+            'title': f'Study shows interval training method {index} doubles endurance gains',
+            'description': f'Researchers compared training method {index} against steady cardio over twelve weeks.',
+            'virality_score': 7.5,
+            'relevance_score': 8.0
+        }
+        for index in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--topics', type=int, default=5, help='topics to generate posts for')
+    parser.add_argument('--batch-size', type=int, default=5, help='topics per batched prompt')
+    args = parser.parse_args()
+
+    client = SimpleNamespace(
+        id=1, name='Peak Performance Coaching', niche='fitness and strength training',
+        target_audience='Busy professionals aged 25-45 who want to get fit with limited time',
+        tone_of_voice='Motivating, friendly and evidence-based',
+        goals='Grow Instagram following, drive sign-ups for online coaching programs'
+    )
+    topics = make_topics(args.topics)
+    generator = ContentGenerator()
+
+    legacy_prefix = estimate_tokens(LEGACY_SYSTEM_PROMPT)
+    legacy_calls = [legacy_prefix + estimate_tokens(legacy_user_prompt(topic, client)) for topic in topics]
+
+    compiled_prefix = estimate_tokens(generator._compile_client_prompt(client))
+    compiled_calls = [compiled_prefix + estimate_tokens(generator._create_content_prompt(topic, client))
+                      for topic in topics]
+
+    batched_calls = []
+    for start in range(0, len(topics), args.batch_size):
+        batch = topics[start:start + args.batch_size]
+        blocks = '\n\n'.join(f"{number}.\n{generator._format_topic_block(topic)}"
+                             for number, topic in enumerate(batch, 1))
+        batched_calls.append(compiled_prefix + estimate_tokens(
+            f"Create one Instagram carousel post for each of these {len(batch)} trending topics. "
+            f"Return them in order as a 'posts' array, each with its topic_number.\n\n{blocks}"
+        ))
+
+    legacy_total = sum(legacy_calls)
+    print(f"{'layout':<12} {'calls':>5} {'tokens/call':>12} {'shared prefix':>14} {'total':>7} {'vs legacy':>10}")
+    for name, calls, prefix in (('legacy', legacy_calls, legacy_prefix),
+                                ('compiled', compiled_calls, compiled_prefix),
+                                ('batched', batched_calls, compiled_prefix)):
+        total = sum(calls)
+        print(f"{name:<12} {len(calls):>5} {total / len(calls):>12.1f} {prefix:>14} {total:>7} "
+              f"{total / legacy_total:>9.2f}x")
+    print("\nLegacy calls share only the system message as a prefix; the client block "
+          "followed the topic, so it was never part of a cacheable prefix.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark cold vs warm service initialization for the serverless handlers
+
+Cold mode builds every service on each simulated invocation, as the
+handlers used to. Warm mode reuses the ServiceRegistry like a container
+that stays alive between invocations.
+
+Usage:
+    python benchmarks/bench_service_registry.py --invocations 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to Python path to import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.registry import ServiceRegistry, SERVICE_FACTORIES
+
+# Placeholder credentials so every client is constructed; nothing is called
+PLACEHOLDER_ENV = {
+    'OPENAI_API_KEY': 'sk-benchmark',
+    'NEWSAPI_KEY': 'benchmark',
+    'REDDIT_CLIENT_ID': 'benchmark',
+    'REDDIT_CLIENT_SECRET': 'benchmark',
+    'TWITTER_BEARER_TOKEN': 'benchmark'
+}
+
+HANDLER_SERVICES = ('news_collector', 'social_collector', 'trend_analyzer', 'content_generator')
+
+
+def time_invocations(invocations, get_services):
+    """Time how long each simulated invocation spends getting its services"""
+    timings = []
+    for _ in range(invocations):
+        started = time.perf_counter()
+        get_services()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def summarize(label, timings):
+    timings = sorted(timings)
+    p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+    print(f"{label:<6} mean={statistics.mean(timings):8.3f}ms  "
+          f"p50={statistics.median(timings):8.3f}ms  p95={p95:8.3f}ms  max={timings[-1]:8.3f}ms")
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--invocations', type=int, default=50)
+    args = parser.parse_args()
+
+    for name, value in PLACEHOLDER_ENV.items():
+        os.environ.setdefault(name, value)
+
+    # Import once up front so module import cost is not counted as cold start
+    for name in HANDLER_SERVICES:
+        SERVICE_FACTORIES[name]()
+
+    def cold():
+        for name in HANDLER_SERVICES:
+            SERVICE_FACTORIES[name]()
+
+    # The first warm invocation pays the build, later ones reuse it
+    registry = ServiceRegistry()
+
+    def warm():
+        for name in HANDLER_SERVICES:
+            registry.get(name)
+
+    print(f"Service initialization over {args.invocations} invocations")
+    cold_mean = summarize('cold', time_invocations(args.invocations, cold))
+    warm_mean = summarize('warm', time_invocations(args.invocations, warm))
+    print(f"Warm reuse is {cold_mean / warm_mean:,.0f}x faster per invocation")
+
+
+if __name__ == '__main__':
+    main()
@@ -48,6 +48,7 @@ const ContentGeneration = () => {
     try {
       const response = await apiService.generateContent({
         client_id: clientId,
+        client: clientData, // Client details for deployments without a client store
         topics: topics.slice(0, 5) // Use top 5 topics
       });
       
@@ -1 +1,5 @@
 # Models package for the trending topics application
+from flask_sqlalchemy import SQLAlchemy
+
+# Shared by every model so they live in one metadata and registry
+db = SQLAlchemy()
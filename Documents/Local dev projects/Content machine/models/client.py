@@ -1,7 +1,11 @@
-from flask_sqlalchemy import SQLAlchemy
+import json
 from datetime import datetime
-
-db = SQLAlchemy()
+from sqlalchemy import inspect, text
+from models import db
+# Targets of Client's relationships, so scripts importing only Client can map it
+from models.trending_topic import TrendingTopic
+from models.generated_content import GeneratedContent
+from models.client_topic_score import ClientTopicScore
 
 class Client(db.Model):
     """Client model for storing client information and preferences"""
@@ -13,12 +17,14 @@ class Client(db.Model):
     target_audience = db.Column(db.Text, nullable=False)
     tone_of_voice = db.Column(db.String(100), nullable=False)
     goals = db.Column(db.Text, nullable=False)
+    model_routes = db.Column(db.Text)  # JSON object of task -> model overrides
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     trending_topics = db.relationship('TrendingTopic', backref='client', lazy=True)
     generated_content = db.relationship('GeneratedContent', backref='client', lazy=True)
+    topic_scores = db.relationship('ClientTopicScore', backref='client', lazy=True)
     
     def to_dict(self):
         """Convert client object to dictionary"""
@@ -29,9 +35,23 @@ class Client(db.Model):
             'target_audience': self.target_audience,
             'tone_of_voice': self.tone_of_voice,
             'goals': self.goals,
+            'model_routes': json.loads(self.model_routes) if self.model_routes else {},
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
     def __repr__(self):
         return f'<Client {self.name}>'
+
+
+def upgrade_client_columns(db):
+    """
+    Add model_routes to clients tables created before per-client model routing
+
+    create_all never alters existing tables, so without this every Client
+    query fails on older databases.
+    """
+    columns = {column['name'] for column in inspect(db.engine).get_columns('clients')}
+    if 'model_routes' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE clients ADD COLUMN model_routes TEXT'))
@@ -0,0 +1,34 @@
+from datetime import datetime
+from models import db
+
+class ClientTopicScore(db.Model):
+    """A client's own scores for a shared niche topic"""
+    __tablename__ = 'client_topic_scores'
+    __table_args__ = (
+        # Serves the per-client trends endpoint and its keyset pagination
+        db.Index('ix_client_topic_scores_client_score', 'client_id', 'overall_score', 'topic_id'),
+    )
+
+    client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), primary_key=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey('niche_topics.id'), primary_key=True)
+    relevance_score = db.Column(db.Float, nullable=False)  # relevance to this client's audience and goals
+    overall_score = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Loaded with the score, since a score is never shown without its topic
+    topic = db.relationship('NicheTopic', lazy='joined')
+
+    def to_dict(self):
+        """Convert to the client's view of the topic, shaped like a trending topic"""
+        data = self.topic.to_dict()
+        data.update({
+            'id': self.topic_id,
+            'client_id': self.client_id,
+            'relevance_score': self.relevance_score,
+            'overall_score': self.overall_score,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        })
+        return data
+
+    def __repr__(self):
+        return f'<ClientTopicScore client {self.client_id} topic {self.topic_id}>'
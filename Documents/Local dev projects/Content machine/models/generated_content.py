@@ -1,21 +1,29 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-
-db = SQLAlchemy()
+from sqlalchemy import inspect, text
+from models import db
+from models.types import JSONColumn, lazy_json
 
 class GeneratedContent(db.Model):
     """Generated content model for storing AI-generated content"""
     __tablename__ = 'generated_content'
+    __table_args__ = (
+        # Serves the per-client history endpoints and their keyset pagination
+        db.Index('ix_generated_content_client_created', 'client_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
-    topic_id = db.Column(db.Integer, db.ForeignKey('trending_topics.id'), nullable=True)
+    topic_id = db.Column(db.Integer, db.ForeignKey('niche_topics.id'), nullable=True)
+    legacy_topic_id = db.Column(db.Integer, nullable=True)  # trending_topics id of posts made before niche pools
     content_type = db.Column(db.String(100), nullable=False)  # instagram_carousel, etc.
-    content = db.Column(db.Text, nullable=False)  # JSON string of generated content
+    content_json = db.Column('content', JSONColumn, nullable=False)  # generated content document
     status = db.Column(db.String(50), default='draft')  # draft, approved, published
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Decoded on first access, so rows listed without their content skip the parse
+    content = lazy_json('content_json')
+    
     def to_dict(self):
         """Convert generated content object to dictionary"""
         return {
@@ -31,3 +39,39 @@ class GeneratedContent(db.Model):
     
     def __repr__(self):
         return f'<GeneratedContent {self.content_type} for client {self.client_id}>'
+
+
+def upgrade_topic_link(db):
+    """
+    Move topic links made before niche pools out of topic_id
+
+    Until then topic_id held trending_topics ids, which would read as
+    unrelated niche_topics ids. Posts created before the first niche pool
+    was collected have their link moved to legacy_topic_id, once, when that
+    column is added. PostgreSQL's foreign key is then pointed at
+    niche_topics; SQLite keeps its old constraint, which it does not enforce.
+    """
+    columns = {column['name'] for column in inspect(db.engine).get_columns('generated_content')}
+    if 'legacy_topic_id' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE generated_content ADD COLUMN legacy_topic_id INTEGER'))
+            first_pool = connection.execute(text('SELECT MIN(collected_at) FROM niche_topics')).scalar()
+            legacy_rows = 'topic_id IS NOT NULL'
+            if first_pool is not None:
+                legacy_rows += ' AND (created_at IS NULL OR created_at < :first_pool)'
+            connection.execute(text(
+                f'UPDATE generated_content SET legacy_topic_id = topic_id, topic_id = NULL WHERE {legacy_rows}'
+            ), {'first_pool': first_pool})
+
+    if db.engine.dialect.name != 'postgresql':
+        return
+
+    for foreign_key in inspect(db.engine).get_foreign_keys('generated_content'):
+        if foreign_key['referred_table'] == 'trending_topics':
+            with db.engine.begin() as connection:
+                connection.execute(text(
+                    f'ALTER TABLE generated_content DROP CONSTRAINT {foreign_key["name"]}'
+                ))
+                connection.execute(text(
+                    'ALTER TABLE generated_content ADD FOREIGN KEY (topic_id) REFERENCES niche_topics (id)'
+                ))
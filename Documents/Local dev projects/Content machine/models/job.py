@@ -0,0 +1,35 @@
+import json
+from datetime import datetime
+from models import db
+
+class Job(db.Model):
+    """Background job model for long-running analysis and generation work"""
+    __tablename__ = 'jobs'
+
+    id = db.Column(db.String(36), primary_key=True)  # UUID
+    job_type = db.Column(db.String(50), nullable=False)  # trend_analysis, content_generation
+    status = db.Column(db.String(20), nullable=False, default='queued', index=True)  # queued, running, completed, failed
+    payload = db.Column(db.Text, nullable=False)  # JSON string of job input
+    result = db.Column(db.Text, nullable=True)  # JSON string of job output
+    error = db.Column(db.Text, nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        """Convert job object to dictionary"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.job_type} {self.id} {self.status}>'
@@ -0,0 +1,67 @@
+from datetime import datetime
+from sqlalchemy import inspect, text
+from models import db
+from models.types import JSONColumn, lazy_json
+
+class NicheTopic(db.Model):
+    """Trending topic collected and scored once per niche, shared by every client in that niche"""
+    __tablename__ = 'niche_topics'
+    __table_args__ = (
+        # Finds a niche's latest pool for the model that scored it
+        db.Index('ix_niche_topics_pool', 'niche', 'scoring_model', 'collected_at'),
+        # Lets retention roll up recent days and prune old ones without a full scan
+        db.Index('ix_niche_topics_collected', 'collected_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    niche = db.Column(db.String(200), nullable=False)  # normalized niche
+    scoring_model = db.Column(db.String(100), nullable=False)  # model (or 'local') that scored the pool
+    title = db.Column(db.String(500), nullable=False)
+    description = db.Column(db.Text, nullable=False)
+    source = db.Column(db.String(100), nullable=False)  # news, twitter, reddit, etc.
+    url = db.Column(db.String(500), nullable=True)
+    virality_score = db.Column(db.Float, nullable=False)
+    relevance_score = db.Column(db.Float, nullable=False)  # relevance to the niche
+    overall_score = db.Column(db.Float, nullable=False)
+    keywords_json = db.Column('keywords', JSONColumn, nullable=True)  # list of keywords
+    sentiment = db.Column(db.String(50), nullable=True)  # positive, negative, neutral
+    collected_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # same for a whole pool
+    fallback_scored = db.Column(db.Boolean, nullable=False, default=False)  # model failed, scored locally
+
+    # Decoded on first access
+    keywords = lazy_json('keywords_json')
+
+    def to_dict(self):
+        """Convert niche topic object to dictionary"""
+        return {
+            'id': self.id,
+            'niche': self.niche,
+            'title': self.title,
+            'description': self.description,
+            'source': self.source,
+            'url': self.url,
+            'virality_score': self.virality_score,
+            'relevance_score': self.relevance_score,
+            'overall_score': self.overall_score,
+            'keywords': self.keywords,
+            'sentiment': self.sentiment,
+            'collected_at': self.collected_at.isoformat() if self.collected_at else None
+        }
+
+    def __repr__(self):
+        return f'<NicheTopic {self.niche}: {self.title[:50]}...>'
+
+
+def upgrade_niche_topic_columns(db):
+    """
+    Add fallback_scored to niche_topics tables created before it existed
+
+    create_all never alters existing tables; pools stored before then were
+    all model-scored or deliberately local.
+    """
+    columns = {column['name'] for column in inspect(db.engine).get_columns('niche_topics')}
+    if 'fallback_scored' not in columns:
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                'ALTER TABLE niche_topics ADD COLUMN fallback_scored BOOLEAN NOT NULL DEFAULT FALSE'
+            ))
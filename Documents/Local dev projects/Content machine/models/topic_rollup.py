@@ -0,0 +1,40 @@
+from datetime import datetime
+from models import db
+from models.types import JSONColumn, lazy_json
+
+class TopicRollup(db.Model):
+    """Daily per-niche aggregate of analyzed trending topics, kept after raw rows are pruned"""
+    __tablename__ = 'topic_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('niche', 'day', name='uq_topic_rollups_niche_day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    niche = db.Column(db.String(200), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    topic_count = db.Column(db.Integer, nullable=False)
+    score_sum = db.Column(db.Float, nullable=False)  # kept so days combine into exact means
+    max_score = db.Column(db.Float, nullable=False)
+    source_counts_json = db.Column('source_counts', JSONColumn, nullable=False)  # source -> topic count
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Decoded on first access
+    source_counts = lazy_json('source_counts_json')
+
+    @property
+    def mean_score(self):
+        return self.score_sum / self.topic_count if self.topic_count else 0.0
+
+    def to_dict(self):
+        """Convert topic rollup object to dictionary"""
+        return {
+            'niche': self.niche,
+            'day': self.day.isoformat(),
+            'topic_count': self.topic_count,
+            'mean_score': round(self.mean_score, 2),
+            'max_score': self.max_score,
+            'source_counts': self.source_counts
+        }
+
+    def __repr__(self):
+        return f'<TopicRollup {self.niche} {self.day}>'
@@ -1,11 +1,16 @@
-from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-
-db = SQLAlchemy()
+from models import db
+from models.types import JSONColumn, lazy_json
 
 class TrendingTopic(db.Model):
     """Trending topic model for storing analyzed trending topics"""
     __tablename__ = 'trending_topics'
+    __table_args__ = (
+        # Serves the per-client history endpoints and their keyset pagination
+        db.Index('ix_trending_topics_client_score', 'client_id', 'overall_score', 'id'),
+        # Lets retention roll up recent days and prune old ones without a full scan
+        db.Index('ix_trending_topics_created', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('clients.id'), nullable=False)
@@ -16,10 +21,13 @@ class TrendingTopic(db.Model):
     virality_score = db.Column(db.Float, nullable=False)
     relevance_score = db.Column(db.Float, nullable=False)
     overall_score = db.Column(db.Float, nullable=False)
-    keywords = db.Column(db.Text, nullable=True)  # JSON string of keywords
+    keywords_json = db.Column('keywords', JSONColumn, nullable=True)  # list of keywords
     sentiment = db.Column(db.String(50), nullable=True)  # positive, negative, neutral
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Decoded on first access
+    keywords = lazy_json('keywords_json')
+    
     def to_dict(self):
         """Convert trending topic object to dictionary"""
         return {
@@ -0,0 +1,93 @@
+from sqlalchemy import Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.types import TypeDecorator
+from services.fast_json import dumps, loads
+
+
+class JSONColumn(TypeDecorator):
+    """
+    JSON document column: JSONB on PostgreSQL, JSON text everywhere else
+
+    In queries the column compares as JSONB, so documents can be filtered in
+    the database: content['slides'][0]['title'] works on both backends and
+    content_json.contains(...) (@>) on PostgreSQL.
+
+    On text backends the raw string is handed back undecoded, so rows that
+    are loaded but never read skip the parse; pair the column with
+    lazy_json() to decode it on first access.
+    """
+
+    impl = JSONB
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(Text())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        if dialect.name == 'postgresql':
+            # JSONB serializes the value itself, so undo callers that already did
+            return loads(value) if isinstance(value, str) else value
+        return value if isinstance(value, str) else dumps(value)
+
+    def process_result_value(self, value, dialect):
+        return value
+
+
+def lazy_json(column_name: str) -> hybrid_property:
+    """
+    Decoded view of a JSONColumn attribute, parsed once per loaded value
+
+    Reads give the decoded document, writes take a document or JSON text,
+    and in queries the property is the column itself.
+
+    Args:
+        column_name: Mapped attribute holding the raw column value
+    """
+    cache_name = f'_{column_name}_decoded'
+
+    def fget(self):
+        raw = getattr(self, column_name)
+        if not isinstance(raw, str):
+            return raw
+        cached = self.__dict__.get(cache_name)
+        if cached is None or cached[0] is not raw:
+            cached = (raw, loads(raw))
+            self.__dict__[cache_name] = cached
+        return cached[1]
+
+    def fset(self, value):
+        setattr(self, column_name, value)
+
+    prop = hybrid_property(fget, fset)
+    return prop.expression(lambda cls: getattr(cls, column_name))
+
+
+def upgrade_json_columns(db, *models):
+    """
+    Convert text columns created before JSONColumn to JSONB on PostgreSQL
+
+    create_all never alters existing tables, so databases that already held
+    JSON strings in text columns are converted in place once.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return
+
+    with db.engine.begin() as connection:
+        for model in models:
+            for column in model.__table__.columns:
+                if not isinstance(column.type, JSONColumn):
+                    continue
+                data_type = connection.execute(text(
+                    "SELECT data_type FROM information_schema.columns "
+                    "WHERE table_name = :table AND column_name = :column"
+                ), {'table': model.__tablename__, 'column': column.name}).scalar()
+                if data_type in ('text', 'character varying'):
+                    connection.execute(text(
+                        f'ALTER TABLE {model.__tablename__} ALTER COLUMN {column.name} '
+                        f'TYPE jsonb USING {column.name}::jsonb'
+                    ))
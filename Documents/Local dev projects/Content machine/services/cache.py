@@ -0,0 +1,246 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Callable
+
+# Seconds collected topics stay fresh per source. Override with
+# TOPIC_CACHE_TTL_<SOURCE>, e.g. TOPIC_CACHE_TTL_REDDIT=300
+DEFAULT_SOURCE_TTLS = {
+    'gnews': 900,
+    'newsapi': 1800,
+    'reddit': 600,
+    'twitter': 300,
+    'twitter_hashtags': 300
+}
+
+DEFAULT_TTL = 600
+
+_MISSING = object()
+
+
+def normalize_niche(niche: str) -> str:
+    """Normalize a niche so equivalent spellings share cache entries"""
+    return ' '.join((niche or '').lower().split())
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, max_size: int = 512, default_ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            max_size: Maximum number of entries before least recently used are evicted
+            default_ttl: Seconds an entry stays valid unless set() is given a ttl
+        """
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Get a cached value, or default if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entries over max_size"""
+        ttl = self.default_ttl if ttl is None else ttl
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Any):
+        """Remove an entry if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, miss and size counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class SQLiteCacheBackend:
+    """Shared cache backend storing JSON values with expiry in a SQLite file"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite database file shared by every process using the cache
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache_entries '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+        self._connection.commit()
+
+    def get(self, key: str) -> Any:
+        """Get a value, or None if it is missing or expired"""
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value, expires_at FROM cache_entries WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a JSON-serializable value for ttl seconds"""
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), time.time() + ttl)
+            )
+            self._connection.execute(
+                'DELETE FROM cache_entries WHERE expires_at <= ?', (time.time(),)
+            )
+            self._connection.commit()
+
+
+class TopicCache:
+    """Cache of collected topics keyed by (source, normalized niche)"""
+
+    def __init__(self, max_size: int = 512, source_ttls: Optional[Dict[str, float]] = None,
+                 backend: Optional[Any] = None):
+        """
+        Args:
+            max_size: Maximum number of (source, niche) entries held in process
+            source_ttls: Seconds topics stay fresh per source
+            backend: Optional shared backend with get(key) and set(key, value, ttl)
+        """
+        self.source_ttls = dict(DEFAULT_SOURCE_TTLS)
+        self.source_ttls.update(source_ttls or {})
+        self.local = TTLCache(max_size=max_size)
+        self.backend = backend
+
+        self._lock = threading.Lock()
+        self.backend_hits = 0
+
+    def get_ttl(self, source: str) -> float:
+        """Get the time-to-live for a source's topics"""
+        return self.source_ttls.get(source, DEFAULT_TTL)
+
+    def get_or_fetch(self, source: str, niche: str,
+                     fetch: Callable[[str], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Get topics for a source and niche, calling fetch only on a cache miss
+
+        Args:
+            source: Source name, e.g. 'gnews' or 'reddit'
+            niche: The niche being collected
+            fetch: Fetcher called with the niche on a miss
+
+        Returns:
+            List of topics (copies, safe for the caller to modify)
+        """
+        key = f"topics:{source}:{normalize_niche(niche)}"
+
+        topics = self.local.get(key, _MISSING)
+        if topics is _MISSING and self.backend is not None:
+            try:
+                topics = self.backend.get(key)
+            except Exception as e:
+                print(f"Error reading shared topic cache: {e}")
+                topics = None
+            if topics is not None:
+                with self._lock:
+                    self.backend_hits += 1
+                self.local.set(key, topics, ttl=self.get_ttl(source))
+            else:
+                topics = _MISSING
+
+        if topics is _MISSING:
+            topics = fetch(niche)
+            # Empty results usually mean an upstream error, so don't pin them
+            if topics:
+                self.local.set(key, topics, ttl=self.get_ttl(source))
+                if self.backend is not None:
+                    try:
+                        self.backend.set(key, topics, self.get_ttl(source))
+                    except Exception as e:
+                        print(f"Error writing shared topic cache: {e}")
+
+        return copy.deepcopy(topics)
+
+    def wrap(self, source: str,
+             fetch: Callable[[str], List[Dict[str, Any]]]) -> Callable[[str], List[Dict[str, Any]]]:
+        """Wrap a source fetcher so it reads through the cache"""
+        return lambda niche: self.get_or_fetch(source, niche, fetch)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit and miss counters for the topic cache"""
+        stats = self.local.get_stats()
+        stats['backend'] = type(self.backend).__name__ if self.backend is not None else None
+        stats['backend_hits'] = self.backend_hits
+        return stats
+
+
+_topic_cache = None
+_topic_cache_lock = threading.Lock()
+
+
+def get_topic_cache() -> TopicCache:
+    """Get the process-wide topic cache, configured from the environment"""
+    global _topic_cache
+    with _topic_cache_lock:
+        if _topic_cache is None:
+            source_ttls = {}
+            for source in DEFAULT_SOURCE_TTLS:
+                configured = os.getenv(f'TOPIC_CACHE_TTL_{source.upper()}')
+                if configured:
+                    source_ttls[source] = float(configured)
+
+            backend = None
+            backend_path = os.getenv('TOPIC_CACHE_DB')
+            if backend_path:
+                try:
+                    backend = SQLiteCacheBackend(backend_path)
+                except Exception as e:
+                    print(f"Error opening shared topic cache, using in-process cache only: {e}")
+
+            _topic_cache = TopicCache(
+                max_size=int(os.getenv('TOPIC_CACHE_SIZE', '512')),
+                source_ttls=source_ttls,
+                backend=backend
+            )
+        return _topic_cache
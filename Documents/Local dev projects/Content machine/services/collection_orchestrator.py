@@ -0,0 +1,134 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Tuple
+from services.rate_limiter import get_rate_limiter_stats
+from services.cache import get_topic_cache
+
+# Shared pool so sources that overrun their deadline finish in the background
+# instead of holding up the request that started them
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Get the process-wide executor used for source fetches"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            max_workers = int(os.getenv('COLLECTION_MAX_WORKERS', '16'))
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='collector')
+        return _executor
+
+
+class CollectionOrchestrator:
+    """Service for fetching every collector source concurrently under deadlines"""
+
+    def __init__(self, collectors: List[Any], source_timeout: Optional[float] = None,
+                 global_timeout: Optional[float] = None,
+                 source_timeouts: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            collectors: Collectors exposing get_source_fetchers() and finalize_topics()
+            source_timeout: Default seconds each source has to respond
+            global_timeout: Seconds after which collection returns whatever has arrived
+            source_timeouts: Optional per-source overrides of source_timeout
+        """
+        self.collectors = collectors
+        self.source_timeout = source_timeout or float(os.getenv('COLLECTION_SOURCE_TIMEOUT', '8'))
+        self.global_timeout = global_timeout or float(os.getenv('COLLECTION_GLOBAL_TIMEOUT', '12'))
+        self.source_timeouts = source_timeouts or {}
+
+    def collect(self, niche: str) -> List[Dict[str, Any]]:
+        """
+        Collect trending topics from every source of every collector at once
+
+        Args:
+            niche: The niche to search for trending topics
+
+        Returns:
+            Combined topics from all collectors, in collector order
+        """
+        topics, _ = self.collect_with_report(niche)
+        return topics
+
+    def collect_with_report(self, niche: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Collect trending topics and report how each source performed
+
+        Args:
+            niche: The niche to search for trending topics
+
+        Returns:
+            Tuple of (combined topics, report with per-source status and timings)
+        """
+        start = time.monotonic()
+        global_deadline = start + self.global_timeout
+        executor = _get_executor()
+
+        futures = {}
+        source_order = []
+        for collector_index, collector in enumerate(self.collectors):
+            for source_name, fetcher in collector.get_source_fetchers().items():
+                future = executor.submit(self._run_source, fetcher, niche)
+                deadline = start + self.source_timeouts.get(source_name, self.source_timeout)
+                futures[future] = (collector_index, source_name, min(deadline, global_deadline))
+                source_order.append((collector_index, source_name))
+
+        results = {}
+        report = {'sources': {}}
+        pending = set(futures)
+
+        while pending:
+            next_deadline = min(futures[future][2] for future in pending)
+            remaining = next_deadline - time.monotonic()
+
+            if remaining > 0:
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    _, source_name, _ = futures[future]
+                    source_topics, elapsed, error = future.result()
+                    results[source_name] = source_topics
+                    report['sources'][source_name] = {
+                        'status': 'error' if error else 'ok',
+                        'count': len(source_topics),
+                        'elapsed': round(elapsed, 3)
+                    }
+
+            # Give up on sources whose deadline has passed
+            now = time.monotonic()
+            for future in [f for f in pending if futures[f][2] <= now]:
+                _, source_name, _ = futures[future]
+                future.cancel()
+                pending.discard(future)
+                report['sources'][source_name] = {
+                    'status': 'timeout',
+                    'count': 0,
+                    'elapsed': round(now - start, 3)
+                }
+                print(f"Source {source_name} missed its collection deadline")
+
+        # Merge in a stable order regardless of completion order
+        topics = []
+        for collector_index, collector in enumerate(self.collectors):
+            collector_topics = []
+            for index, source_name in source_order:
+                if index == collector_index:
+                    collector_topics.extend(results.get(source_name, []))
+            topics.extend(collector.finalize_topics(collector_topics, niche))
+
+        report['elapsed'] = round(time.monotonic() - start, 3)
+        report['total_topics'] = len(topics)
+        report['rate_limits'] = get_rate_limiter_stats()
+        report['topic_cache'] = get_topic_cache().get_stats()
+        return topics, report
+
+    def _run_source(self, fetcher, niche: str) -> Tuple[List[Dict[str, Any]], float, Optional[str]]:
+        """Run a single source fetcher, timing it and isolating failures"""
+        started = time.monotonic()
+        try:
+            return fetcher(niche) or [], time.monotonic() - started, None
+        except Exception as e:
+            print(f"Error fetching source: {e}")
+            return [], time.monotonic() - started, str(e)
@@ -1,14 +1,70 @@
 import openai
 import os
 import json
-from typing import Dict, Any, List
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 import re
+from services.cache import TTLCache
+from services.single_flight import coalesce_openai
+from services.model_router import get_model_router
+from services.json_stream import JSONStreamExtractor, extract_json, iter_completion_text
+from services.schemas import (
+    CarouselPost, CarouselSlide, SchemaError, CAROUSEL_BATCH_FUNCTION, CAROUSEL_POST_FUNCTION,
+    CAROUSEL_SLIDES_FUNCTION
+)
+from services.structured_output import (
+    structured_output_enabled, structured_output_retries, function_call_kwargs,
+    function_arguments, iter_function_arguments, validation_stats
+)
+
+CAROUSEL_SYSTEM_PROMPT = """You are an expert social media content creator specializing in Instagram carousel posts.
+Create engaging, informative carousel content that follows Instagram best practices.
+
+Return your response as a JSON object with:
+- main_title: Catchy title for the carousel
+- slides: Array of 5-7 slides, each containing:
+  - slide_number: Slide number (1, 2, 3, etc.)
+  - title: Slide title (max 60 characters)
+  - content: Main content text (max 150 characters)
+  - call_to_action: Action item or tip
+  - hashtags: Array of 3-5 relevant hashtags
+- caption: Engaging caption for the post
+- overall_theme: Brief description of the carousel theme
+
+Make content engaging, educational, and aligned with the client's tone of voice."""
+
+CAROUSEL_REQUIREMENTS = """REQUIREMENTS:
+1. Create 5-7 engaging slides that educate and inform
+2. Use the client's tone of voice consistently
+3. Include actionable tips and insights
+4. Make it shareable and engaging
+5. Use relevant hashtags for discoverability
+6. Include a compelling caption that encourages engagement
+
+The carousel should provide value to the target audience while leveraging the trending topic's momentum."""
+
+# Client fields baked into the compiled system message; a change to any of them compiles a new one
+CLIENT_PROMPT_FIELDS = ('id', 'name', 'niche', 'target_audience', 'tone_of_voice', 'goals')
+
+# Rough completion size of one carousel, used to size batched prompts
+OUTPUT_TOKENS_PER_POST = 1000
+
+_client_prompts = TTLCache(
+    max_size=int(os.getenv('CLIENT_PROMPT_CACHE_SIZE', '256')),
+    default_ttl=float(os.getenv('CLIENT_PROMPT_CACHE_TTL', '3600'))
+)
+
+# Caps concurrent OpenAI generation calls across every generator in the process
+_generation_slots = threading.BoundedSemaphore(int(os.getenv('OPENAI_MAX_CONCURRENCY', '4')))
 
 class ContentGenerator:
     """Service for generating Instagram carousel posts using AI"""
     
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, router=None):
+        self.openai_client = coalesce_openai(openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY')))
+        self.router = router or get_model_router()
     
     def generate_carousel_post(self, topic: Dict[str, Any], client: Any) -> Dict[str, Any]:
         """
@@ -22,98 +78,405 @@ class ContentGenerator:
             Dictionary containing carousel post content
         """
         try:
-            # Prepare prompt for content generation
-            prompt = self._create_content_prompt(topic, client)
+            generated_content = None
+            for event, payload in self.stream_carousel_post(topic, client):
+                if event == 'post':
+                    generated_content = payload
+            return generated_content
+            
+        except Exception as e:
+            print(f"Error generating content with AI: {e}")
+            # Fallback to template-based generation
+            return self._generate_fallback_content(topic, client)
+    
+    def stream_carousel_post(self, topic: Dict[str, Any], client: Any) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Generate a carousel post, yielding each slide as soon as the model finishes it
+        
+        Args:
+            topic: The trending topic to create content for
+            client: Client object with preferences and goals
+            
+        Yields:
+            ('slide', slide) tuples while the response streams, then one
+            ('post', post) tuple with the complete post. OpenAI errors are
+            raised to the caller.
+        """
+        # The system message is the same for every topic of a client, so it comes first
+        messages = [
+            {
+                "role": "system",
+                "content": self._compile_client_prompt(client)
+            },
+            {
+                "role": "user",
+                "content": self._create_content_prompt(topic, client)
+            }
+        ]
+        
+        # Answer through the declared schema when structured output is on
+        structured = structured_output_enabled()
+        schema_kwargs = function_call_kwargs(CAROUSEL_POST_FUNCTION) if structured else {}
+        
+        # Generate content using OpenAI, on the client's carousel model
+        model = self.router.model_for('carousel', client)
+        started = time.perf_counter()
+        response = self.openai_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=2500,
+            stream=True,
+            **schema_kwargs
+        )
+        chunks = iter_function_arguments(response) if structured else iter_completion_text(response)
+        chunks = self.router.track_stream('carousel', model, messages, chunks, started)
+        
+        extractor = JSONStreamExtractor(dict, item_key='slides')
+        slides = []
+        text = []
+        for chunk in chunks:
+            text.append(chunk)
+            for raw_slide in extractor.feed(chunk):
+                slides.append(self._validate_slide(raw_slide, len(slides) + 1))
+                if slides[-1] is not None:
+                    yield 'slide', slides[-1].to_dict()
+        for raw_slide in extractor.finish():
+            slides.append(self._validate_slide(raw_slide, len(slides) + 1))
+            if slides[-1] is not None:
+                yield 'slide', slides[-1].to_dict()
+        
+        if extractor.result is not None:
+            generated_content = extractor.result
+        else:
+            # Output was cut off or not JSON, keep the slides that completed
+            generated_content = self._fallback_content_parsing(''.join(text))
+        
+        yield from self._finish_post(generated_content, slides, topic, client, messages)
+    
+    def _finish_post(self, generated_content: Dict[str, Any], slides: List[Optional[CarouselSlide]],
+                     topic: Dict[str, Any], client: Any,
+                     messages: List[Dict[str, str]]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Validate a decoded post, repair its invalid slides and add metadata
+        
+        Args:
+            generated_content: Decoded post from the model
+            slides: Slides already validated while streaming, empty if none were
+            topic: The topic the post is about
+            client: Client object with preferences and goals
+            messages: Messages that produced the post, reused for slide repairs
+            
+        Yields:
+            ('slide', slide) for slides not yielded yet, then ('post', post)
+        """
+        if not slides:
+            for raw_slide in generated_content.get('slides') or []:
+                slides.append(self._validate_slide(raw_slide, len(slides) + 1))
+                if slides[-1] is not None:
+                    yield 'slide', slides[-1].to_dict()
+        
+        # Ask again for just the slides that failed validation
+        invalid_positions = [position for position, slide in enumerate(slides) if slide is None]
+        retrying = bool(invalid_positions) and structured_output_retries() > 0
+        validation_stats.record('slides', valid=len(slides) - len(invalid_positions),
+                                invalid=len(invalid_positions), retried=len(invalid_positions) if retrying else 0)
+        if retrying:
+            for position, slide in self._retry_slides(messages, generated_content, invalid_positions, client):
+                slides[position] = slide
+                yield 'slide', slide.to_dict()
+        
+        slides = [slide for slide in slides if slide is not None]
+        if not slides:
+            raise SchemaError('AI response has no valid slides')
+        
+        try:
+            post = CarouselPost.from_dict(generated_content)
+        except SchemaError as e:
+            # The slides are the expensive part, so keep them and use template post fields
+            print(f"Invalid carousel post fields from AI, using template fields: {e}")
+            template = self._generate_fallback_content(topic, client)
+            post = CarouselPost(template['main_title'], template['caption'], template['overall_theme'])
+        
+        generated_content = post.to_dict(slides)
+        
+        # Add metadata
+        generated_content['topic_title'] = topic.get('title', '')
+        generated_content['client_name'] = client.name
+        generated_content['generated_at'] = self._get_current_timestamp()
+        
+        yield 'post', generated_content
+    
+    def stream_carousel_batch(self, topics: List[Dict[str, Any]],
+                              client: Any) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Generate carousels for several topics in one completion
+        
+        The client's system message is sent once for the whole batch instead
+        of once per topic. Each post is validated and yielded as soon as its
+        JSON object completes in the stream.
+        
+        Args:
+            topics: The trending topics to create content for
+            client: Client object with preferences and goals
             
-            # Generate content using OpenAI
+        Yields:
+            (topic index, post) tuples in the order the model writes them.
+            Topics the model skipped are not yielded.
+        """
+        topic_blocks = '\n\n'.join(
+            f"{number}.\n{self._format_topic_block(topic)}" for number, topic in enumerate(topics, 1)
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": self._compile_client_prompt(client)
+            },
+            {
+                "role": "user",
+                "content": (f"Create one Instagram carousel post for each of these {len(topics)} trending topics. "
+                            f"Return them in order as a 'posts' array, each with its topic_number.\n\n"
+                            f"{topic_blocks}")
+            }
+        ]
+        
+        model = self.router.model_for('carousel', client)
+        started = time.perf_counter()
+        response = self.openai_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=min(OUTPUT_TOKENS_PER_POST * len(topics) + 500, self._batch_output_tokens()),
+            stream=True,
+            **function_call_kwargs(CAROUSEL_BATCH_FUNCTION)
+        )
+        chunks = self.router.track_stream('carousel', model, messages, iter_function_arguments(response), started)
+        
+        extractor = JSONStreamExtractor(dict, item_key='posts')
+        done = set()
+        position = 0
+        for raw_post in self._iter_stream_items(extractor, chunks):
+            # Match by the number we gave the model, then by position
+            number = raw_post.get('topic_number')
+            index = number - 1 if isinstance(number, int) and 0 < number <= len(topics) else position
+            position += 1
+            if index >= len(topics) or index in done:
+                continue
+            done.add(index)
+            
+            try:
+                for event, payload in self._finish_post(raw_post, [], topics[index], client, messages):
+                    if event == 'post':
+                        yield index, payload
+            except SchemaError as e:
+                print(f"Invalid batched post for topic {index + 1}: {e}")
+    
+    def _iter_stream_items(self, extractor: JSONStreamExtractor, chunks: Iterator[str]) -> Iterator[Dict[str, Any]]:
+        """Feed streamed text to an extractor, yielding items as they complete"""
+        for chunk in chunks:
+            yield from extractor.feed(chunk)
+        yield from extractor.finish()
+    
+    def _batch_output_tokens(self) -> int:
+        """Completion token budget for one batched prompt"""
+        return int(os.getenv('CONTENT_BATCH_MAX_OUTPUT_TOKENS', '6000'))
+    
+    def _plan_prompt_batches(self, topics: List[Dict[str, Any]]) -> List[List[int]]:
+        """
+        Group topic indexes into batched prompts
+        
+        Batching saves the repeated system message on every topic after the
+        first, so groups are as large as CONTENT_PROMPT_BATCH_SIZE and the
+        completion budget allow. A size of 1 keeps one call per topic.
+        """
+        batch_size = int(os.getenv('CONTENT_PROMPT_BATCH_SIZE', '1'))
+        batch_size = max(1, min(batch_size, self._batch_output_tokens() // OUTPUT_TOKENS_PER_POST))
+        indexes = list(range(len(topics)))
+        return [indexes[start:start + batch_size] for start in range(0, len(indexes), batch_size)]
+    
+    def _validate_slide(self, raw_slide: Any, position: int) -> Optional[CarouselSlide]:
+        """Validate one slide against the slide schema, returning None when unusable"""
+        try:
+            return CarouselSlide.from_dict(raw_slide, position)
+        except SchemaError as e:
+            print(f"Invalid slide {position} from AI: {e}")
+            return None
+    
+    def _retry_slides(self, messages: List[Dict[str, str]], generated_content: Dict[str, Any],
+                      positions: List[int], client: Any = None) -> List[Tuple[int, CarouselSlide]]:
+        """
+        Re-request only the invalid slides of a post
+        
+        Args:
+            messages: Messages that produced the post
+            generated_content: The decoded post, sent back as context
+            positions: 0-based positions of the invalid slides
+            client: Client whose model routes pick the repair model
+            
+        Returns:
+            (position, slide) pairs for the slides that are valid this time
+        """
+        numbers = ', '.join(str(position + 1) for position in positions)
+        print(f"Retrying {len(positions)} invalid slides ({numbers})")
+        
+        # Short, well-specified repairs don't need the large model
+        model = self.router.model_for('slide_repair', client)
+        repair_messages = messages + [
+            {"role": "assistant", "content": json.dumps(generated_content)},
+            {"role": "user", "content": f"These slides are missing a title or content: {numbers}. "
+                                        f"Rewrite only those slides, keeping their slide numbers."}
+        ]
+        started = time.perf_counter()
+        try:
             response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert social media content creator specializing in Instagram carousel posts. 
-                        Create engaging, informative carousel content that follows Instagram best practices.
-                        
-                        Return your response as a JSON object with:
-                        - main_title: Catchy title for the carousel
-                        - slides: Array of 5-7 slides, each containing:
-                          - slide_number: Slide number (1, 2, 3, etc.)
-                          - title: Slide title (max 60 characters)
-                          - content: Main content text (max 150 characters)
-                          - call_to_action: Action item or tip
-                          - hashtags: Array of 3-5 relevant hashtags
-                        - caption: Engaging caption for the post
-                        - overall_theme: Brief description of the carousel theme
-                        
-                        Make content engaging, educational, and aligned with the client's tone of voice."""
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
+                model=model,
+                messages=repair_messages,
                 temperature=0.7,
-                max_tokens=2500
+                max_tokens=300 * len(positions) + 200,
+                **function_call_kwargs(CAROUSEL_SLIDES_FUNCTION)
             )
+        except Exception as e:
+            print(f"Error retrying slides with AI: {e}")
+            return []
+        
+        arguments = function_arguments(response)
+        self.router.record('slide_repair', model, repair_messages, arguments, time.perf_counter() - started)
+        replacements = extract_json(arguments, list) or []
+        repaired = []
+        for offset, raw_slide in enumerate(replacements):
+            number = raw_slide.get('slide_number')
+            position = number - 1 if isinstance(number, int) and number - 1 in positions else None
+            if position is None and offset < len(positions):
+                position = positions[offset]
+            if position is None or position in (done for done, _ in repaired):
+                continue
+            slide = self._validate_slide(raw_slide, position + 1)
+            if slide is not None:
+                repaired.append((position, slide))
+        return repaired
+    
+    def generate_carousel_posts(self, topics: List[Dict[str, Any]], client: Any,
+                                max_workers: Optional[int] = None) -> List[Optional[Dict[str, Any]]]:
+        """
+        Generate carousel posts for several topics at once
+        
+        Args:
+            topics: The trending topics to create content for
+            client: Client object with preferences and goals
+            max_workers: Most posts generated at the same time for this batch
             
-            content = response.choices[0].message.content
-            generated_content = self._parse_content_response(content)
-            
-            # Add metadata
-            generated_content['topic_title'] = topic.get('title', '')
-            generated_content['client_name'] = client.name
-            generated_content['generated_at'] = self._get_current_timestamp()
+        Returns:
+            Posts in the same order as topics. A topic whose generation and
+            fallback both fail is returned as None.
+        """
+        posts = [None] * len(topics)
+        for index, post in self.iter_carousel_posts(topics, client, max_workers):
+            posts[index] = post
+        return posts
+    
+    def iter_carousel_posts(self, topics: List[Dict[str, Any]], client: Any,
+                            max_workers: Optional[int] = None) -> Iterator[Tuple[int, Optional[Dict[str, Any]]]]:
+        """
+        Generate carousel posts concurrently, yielding each one as soon as it is ready
+        
+        Args:
+            topics: The trending topics to create content for
+            client: Client object with preferences and goals
+            max_workers: Most posts generated at the same time for this batch
             
-            return generated_content
+        Yields:
+            Tuples of (topic index, post) in completion order. The post is
+            None when generation and fallback both fail.
+        """
+        if not topics:
+            return
+        
+        max_workers = max_workers or int(os.getenv('CONTENT_BATCH_WORKERS', '5'))
+        groups = self._plan_prompt_batches(topics)
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(groups)))
+        try:
+            futures = {}
+            for group in groups:
+                if len(group) == 1:
+                    future = executor.submit(self._generate_post_isolated, topics[group[0]], client)
+                else:
+                    future = executor.submit(self._generate_batch_isolated, [topics[i] for i in group], client)
+                futures[future] = group
             
-        except Exception as e:
-            print(f"Error generating content with AI: {e}")
-            # Fallback to template-based generation
+            for future in as_completed(futures):
+                group = futures[future]
+                if len(group) == 1:
+                    yield group[0], future.result()
+                else:
+                    for offset, post in enumerate(future.result()):
+                        yield group[offset], post
+        finally:
+            # Stop queued topics if the consumer goes away early
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _generate_post_isolated(self, topic: Dict[str, Any], client: Any) -> Optional[Dict[str, Any]]:
+        """Generate one post within the process-wide limit, isolating failures"""
+        with _generation_slots:
+            try:
+                return self.generate_carousel_post(topic, client)
+            except Exception as e:
+                print(f"Error generating content for topic {topic.get('title', 'Unknown')}: {e}")
+        
+        try:
             return self._generate_fallback_content(topic, client)
+        except Exception as e:
+            print(f"Error generating fallback content for topic {topic.get('title', 'Unknown')}: {e}")
+            return None
     
-    def _create_content_prompt(self, topic: Dict[str, Any], client: Any) -> str:
-        """Create detailed prompt for content generation"""
-        prompt = f"""
-        Create an Instagram carousel post for the following trending topic:
-        
-        TOPIC: {topic.get('title', '')}
-        DESCRIPTION: {topic.get('description', '')}
-        VIRALITY SCORE: {topic.get('virality_score', 0)}/10
-        RELEVANCE SCORE: {topic.get('relevance_score', 0)}/10
-        
-        CLIENT DETAILS:
-        - Name: {client.name}
-        - Niche: {client.niche}
-        - Target Audience: {client.target_audience}
-        - Tone of Voice: {client.tone_of_voice}
-        - Goals: {client.goals}
-        
-        REQUIREMENTS:
-        1. Create 5-7 engaging slides that educate and inform
-        2. Use the client's tone of voice consistently
-        3. Include actionable tips and insights
-        4. Make it shareable and engaging
-        5. Use relevant hashtags for discoverability
-        6. Include a compelling caption that encourages engagement
-        
-        The carousel should provide value to the target audience while leveraging the trending topic's momentum.
+    def _compile_client_prompt(self, client: Any) -> str:
         """
+        Get the system message for a client, compiled once and cached
+        
+        The static instructions come first and the client block after them,
+        so every call for a client shares one identical prompt prefix that
+        provider-side prompt caching can reuse.
+        """
+        key = tuple(str(getattr(client, field, '')) for field in CLIENT_PROMPT_FIELDS)
+        prompt = _client_prompts.get(key)
+        if prompt is None:
+            prompt = (f"{CAROUSEL_SYSTEM_PROMPT}\n\n"
+                      f"CLIENT DETAILS:\n"
+                      f"- Name: {client.name}\n"
+                      f"- Niche: {client.niche}\n"
+                      f"- Target Audience: {client.target_audience}\n"
+                      f"- Tone of Voice: {client.tone_of_voice}\n"
+                      f"- Goals: {client.goals}\n\n"
+                      f"{CAROUSEL_REQUIREMENTS}")
+            _client_prompts.set(key, prompt)
         return prompt
     
-    def _parse_content_response(self, content: str) -> Dict[str, Any]:
-        """Parse AI response to extract generated content"""
-        try:
-            # Try to extract JSON from the response
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                return json.loads(json_str)
-            else:
-                # Fallback parsing
-                return self._fallback_content_parsing(content)
-        except json.JSONDecodeError:
-            print("Failed to parse AI response as JSON, using fallback parsing")
-            return self._fallback_content_parsing(content)
+    def _generate_batch_isolated(self, topics: List[Dict[str, Any]], client: Any) -> List[Optional[Dict[str, Any]]]:
+        """Generate a batched prompt within the process-wide limit, one post per topic"""
+        posts = [None] * len(topics)
+        with _generation_slots:
+            try:
+                for index, post in self.stream_carousel_batch(topics, client):
+                    posts[index] = post
+            except Exception as e:
+                print(f"Error generating batched content for {len(topics)} topics: {e}")
+        
+        # Topics the batch missed get their own call
+        for index, topic in enumerate(topics):
+            if posts[index] is None:
+                posts[index] = self._generate_post_isolated(topic, client)
+        return posts
+    
+    def _create_content_prompt(self, topic: Dict[str, Any], client: Any) -> str:
+        """Create the per-topic part of the prompt; the client details live in the system message"""
+        return (f"Create an Instagram carousel post for the following trending topic:\n"
+                f"{self._format_topic_block(topic)}")
+    
+    def _format_topic_block(self, topic: Dict[str, Any]) -> str:
+        """Format the details of one topic for a prompt"""
+        return (f"TOPIC: {topic.get('title', '')}\n"
+                f"DESCRIPTION: {topic.get('description', '')}\n"
+                f"VIRALITY SCORE: {topic.get('virality_score', 0)}/10\n"
+                f"RELEVANCE SCORE: {topic.get('relevance_score', 0)}/10")
     
     def _fallback_content_parsing(self, content: str) -> Dict[str, Any]:
         """Fallback parsing when JSON parsing fails"""
@@ -226,8 +589,10 @@ class ContentGenerator:
         }
         
         # Generate content for top 5 topics
-        for i, topic in enumerate(topics[:5]):
-            post = self.generate_carousel_post(topic, client)
+        posts = self.generate_carousel_posts(topics[:5], client)
+        for i, post in enumerate(posts):
+            if post is None:
+                continue
             post['scheduled_day'] = f"Day {i+1}"
             weekly_plan['posts'].append(post)
         
@@ -0,0 +1,168 @@
+import random
+import hashlib
+from typing import List, Dict, Any, Callable, FrozenSet, Optional, Tuple
+
+# Mersenne prime used as the modulus of the MinHash permutations
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Bands x rows must equal the number of permutations. 32 bands of 4 rows make
+# any pair with Jaccard >= 0.7 a candidate with probability above 99.9%.
+DEFAULT_NUM_PERM = 128
+DEFAULT_BANDS = 32
+
+
+def title_tokens(title: str) -> FrozenSet[str]:
+    """Tokenize a title into the lowercase word set used for similarity"""
+    return frozenset((title or '').lower().split())
+
+
+def jaccard(tokens1: FrozenSet[str], tokens2: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets (0.0 when either is empty)"""
+    if not tokens1 or not tokens2:
+        return 0.0
+    intersection = len(tokens1 & tokens2)
+    return intersection / (len(tokens1) + len(tokens2) - intersection)
+
+
+class NearDuplicateDetector:
+    """
+    Near-duplicate detection with MinHash signatures and LSH banding
+
+    Each title is tokenized and signed once. Only titles that share an LSH
+    bucket are compared, and candidates are confirmed with the exact Jaccard
+    similarity of their token sets. The result therefore matches a pairwise
+    comparison without its O(n^2) cost.
+    """
+
+    def __init__(self, threshold: float, num_perm: int = DEFAULT_NUM_PERM,
+                 bands: int = DEFAULT_BANDS, seed: int = 1):
+        """
+        Args:
+            threshold: Titles with Jaccard similarity above this are duplicates
+            num_perm: Number of MinHash permutations per signature
+            bands: Number of LSH bands, must divide num_perm
+            seed: Seed for the permutation coefficients
+        """
+        if num_perm % bands:
+            raise ValueError('bands must divide num_perm')
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        generator = random.Random(seed)
+        self._permutations = [
+            (generator.randrange(1, _MERSENNE_PRIME), generator.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._token_hashes = {}
+
+    def _hash_token(self, token: str) -> Tuple[int, ...]:
+        """Get a token's value under every permutation, computed once per token"""
+        hashed = self._token_hashes.get(token)
+        if hashed is None:
+            value = int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+            hashed = tuple(
+                ((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH
+                for a, b in self._permutations
+            )
+            # Bound memory when the detector lives for the whole process
+            if len(self._token_hashes) > 200000:
+                self._token_hashes.clear()
+            self._token_hashes[token] = hashed
+        return hashed
+
+    def signature(self, tokens: FrozenSet[str]) -> Tuple[int, ...]:
+        """Compute the MinHash signature of a token set"""
+        return tuple(map(min, zip(*(self._hash_token(token) for token in tokens))))
+
+    def band_keys(self, signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        """Split a signature into the LSH bucket keys for each band"""
+        rows = self.rows
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def deduplicate(self, items: List[Dict[str, Any]],
+                    key: Callable[[Dict[str, Any]], str] = None) -> List[Dict[str, Any]]:
+        """
+        Keep the first of every group of near-duplicate items, preserving order
+
+        Args:
+            items: Items to deduplicate, e.g. topics
+            key: Function returning the text to compare, defaults to the title
+
+        Returns:
+            Items that are not near-duplicates of an earlier kept item
+        """
+        return [
+            items[index]
+            for index, representative in self.assign_clusters(items, key)
+            if index == representative
+        ]
+
+    def assign_clusters(self, items: List[Dict[str, Any]],
+                        key: Callable[[Dict[str, Any]], str] = None) -> List[Tuple[int, int]]:
+        """
+        Map every item to the index of the kept item it duplicates
+
+        Args:
+            items: Items to cluster
+            key: Function returning the text to compare, defaults to the title
+
+        Returns:
+            (item index, representative index) pairs in item order. Kept
+            items are their own representative.
+        """
+        key = key or (lambda item: item.get('title', ''))
+        buckets = {}
+        exact = {}
+        kept_tokens = {}
+        assignments = []
+
+        for index, item in enumerate(items):
+            tokens = title_tokens(key(item))
+            band_keys = self.band_keys(self.signature(tokens)) if tokens else []
+            representative = self._find_match(tokens, band_keys, buckets, exact, kept_tokens)
+
+            if representative is None:
+                representative = index
+                if tokens:
+                    kept_tokens[index] = tokens
+                    exact.setdefault(tokens, index)
+                    for band_key in band_keys:
+                        buckets.setdefault(band_key, []).append(index)
+
+            assignments.append((index, representative))
+
+        return assignments
+
+    def _find_match(self, tokens: FrozenSet[str], band_keys: List, buckets: Dict, exact: Dict,
+                    kept_tokens: Dict[int, FrozenSet[str]]) -> Optional[int]:
+        """Find the earliest kept item similar enough to the tokens"""
+        if not tokens:
+            return None
+
+        # Identical token sets always match, whatever the threshold
+        if tokens in exact and self.threshold < 1.0:
+            return exact[tokens]
+
+        candidates = set()
+        for band_key in band_keys:
+            candidates.update(buckets.get(band_key, ()))
+
+        for candidate in sorted(candidates):
+            if jaccard(tokens, kept_tokens[candidate]) > self.threshold:
+                return candidate
+        return None
+
+
+_detectors = {}
+
+
+def get_detector(threshold: float) -> NearDuplicateDetector:
+    """Get a shared detector for a threshold, reusing its token hash cache"""
+    detector = _detectors.get(threshold)
+    if detector is None:
+        detector = _detectors.setdefault(threshold, NearDuplicateDetector(threshold))
+    return detector
@@ -0,0 +1,85 @@
+import re
+import json
+import hashlib
+from typing import List, Dict, Any
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+_NON_WORD = re.compile(r'[^\w\s]+')
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase text, drop punctuation and collapse whitespace"""
+    return ' '.join(_NON_WORD.sub(' ', (text or '').lower()).split())
+
+
+def hash_topic_batch(topics: List[Dict[str, Any]], niche: str, version: str) -> str:
+    """
+    Build a stable content hash for a batch of topics
+
+    The hash ignores topic order, letter case, punctuation and whitespace so
+    batches that produce the same prompt content share a key.
+
+    Args:
+        topics: Topics as collected, with title, description and source
+        niche: The niche the batch is analyzed for
+        version: Prompt version, so prompt changes invalidate old results
+
+    Returns:
+        Hex digest identifying the batch
+    """
+    normalized_topics = sorted(
+        (
+            normalize_text(topic.get('title', '')),
+            normalize_text(topic.get('description', '')),
+            (topic.get('source') or '').lower()
+        )
+        for topic in topics
+    )
+    payload = json.dumps({
+        'version': version,
+        'niche': normalize_text(niche),
+        'topics': normalized_topics
+    }, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Query parameters that only track the click and never change the story
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'igshid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'cmpid'}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonicalize a URL so links to the same page compare equal
+
+    Lowercases the scheme and host, drops 'www.', fragments, tracking
+    parameters and trailing slashes, and sorts the remaining query.
+    """
+    if not url:
+        return ''
+
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/')
+
+    return urlunsplit(('https' if parts.scheme in ('http', 'https', '') else parts.scheme,
+                       host, path, urlencode(query), ''))
+
+
+def topic_fingerprint(topic: Dict[str, Any]) -> str:
+    """
+    Get a stable identifier for a topic across collection runs
+
+    Topics with a URL are identified by the canonical URL, since several
+    sources reuse generic titles. Others fall back to the normalized title.
+    """
+    url = canonicalize_url(topic.get('url', ''))
+    if url:
+        return f"url:{url}"
+    return f"title:{normalize_text(topic.get('title', ''))}"
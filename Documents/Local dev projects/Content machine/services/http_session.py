@@ -0,0 +1,95 @@
+import os
+import threading
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Browser-like agent for APIs whose client libraries don't set their own
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTP adapter that applies a default timeout to every request"""
+
+    def __init__(self, *args, timeout: float = 10.0, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_http_adapter(pool_connections: Optional[int] = None, pool_maxsize: Optional[int] = None,
+                        max_retries: Optional[int] = None, backoff_factor: Optional[float] = None,
+                        timeout: Optional[float] = None) -> TimeoutHTTPAdapter:
+    """
+    Create a connection-pooling adapter with retries, backoff and a default timeout
+
+    Args:
+        pool_connections: Number of hosts to keep connection pools for
+        pool_maxsize: Keep-alive connections kept per host
+        max_retries: Retries for connection errors and retryable status codes
+        backoff_factor: Exponential backoff factor between retries, in seconds
+        timeout: Default (connect and read) timeout in seconds
+
+    Returns:
+        Configured adapter, safe to mount on several sessions
+    """
+    retry = Retry(
+        total=max_retries if max_retries is not None else int(os.getenv('HTTP_MAX_RETRIES', '3')),
+        backoff_factor=backoff_factor if backoff_factor is not None else float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5')),
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    return TimeoutHTTPAdapter(
+        pool_connections=pool_connections or int(os.getenv('HTTP_POOL_CONNECTIONS', '10')),
+        pool_maxsize=pool_maxsize or int(os.getenv('HTTP_POOL_MAXSIZE', '20')),
+        max_retries=retry,
+        timeout=timeout or float(os.getenv('HTTP_TIMEOUT', '10'))
+    )
+
+
+_adapter = None
+_sessions = {}
+_lock = threading.Lock()
+
+
+def get_http_session(name: str = 'default') -> requests.Session:
+    """
+    Get a process-wide session that reuses the shared connection pools
+
+    Each name gets its own Session so client libraries can set their own
+    headers, but every session mounts the same adapter. Keep-alive and TLS
+    connections are therefore shared across all collectors.
+
+    Args:
+        name: Session name, usually the upstream client using it
+
+    Returns:
+        Shared requests.Session for the name
+    """
+    global _adapter
+    with _lock:
+        if _adapter is None:
+            _adapter = create_http_adapter()
+
+        session = _sessions.get(name)
+        if session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = DEFAULT_USER_AGENT
+            session.mount('https://', _adapter)
+            session.mount('http://', _adapter)
+            _sessions[name] = session
+        return session
+
+
+def get_http_pool_stats() -> Dict[str, int]:
+    """Get the number of hosts with open pools in the shared adapter"""
+    with _lock:
+        if _adapter is None:
+            return {'hosts': 0, 'sessions': 0}
+        return {'hosts': len(_adapter.poolmanager.pools), 'sessions': len(_sessions)}
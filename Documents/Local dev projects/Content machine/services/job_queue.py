@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Callable
+
+# Statuses a job can no longer leave
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+class JobQueue:
+    """Service for running pipeline work on a worker pool, with state kept in the database"""
+
+    def __init__(self, app: Any, db: Any, job_model: Any, max_workers: Optional[int] = None):
+        """
+        Args:
+            app: Flask application, used to give workers an app context
+            db: Flask-SQLAlchemy instance holding the job table
+            job_model: Job model class
+            max_workers: Number of jobs run at the same time
+        """
+        self.app = app
+        self.db = db
+        self.job_model = job_model
+        self.max_workers = max_workers or int(os.getenv('JOB_WORKERS', '2'))
+        self.stale_after = timedelta(seconds=int(os.getenv('JOB_STALE_SECONDS', '900')))
+        self.max_attempts = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+        self.sweep_interval = float(os.getenv('JOB_SWEEP_SECONDS', '60'))
+        self.handlers = {}
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+
+        # Jobs this process is running, never treated as stale by its own sweeps
+        self._running = set()
+        self._running_lock = threading.Lock()
+        self._sweeper = None
+
+    def register(self, job_type: str, handler: Callable[[Dict[str, Any]], Any]):
+        """
+        Register the function that runs a job type
+
+        Args:
+            job_type: Name used when submitting jobs
+            handler: Called with the job payload, returns a JSON-serializable result
+        """
+        self.handlers[job_type] = handler
+
+    def submit(self, job_type: str, payload: Dict[str, Any]) -> str:
+        """
+        Store a new job and schedule it on the worker pool
+
+        Args:
+            job_type: A registered job type
+            payload: JSON-serializable job input
+
+        Returns:
+            The new job's id
+        """
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job = self.job_model(
+            id=str(uuid.uuid4()),
+            job_type=job_type,
+            status='queued',
+            payload=json.dumps(payload),
+            created_at=datetime.utcnow()
+        )
+        self.db.session.add(job)
+        self.db.session.commit()
+
+        self.executor.submit(self._run, job.id)
+        return job.id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job's current state, or None if it does not exist"""
+        job = self.db.session.get(self.job_model, job_id)
+        if job is None:
+            return None
+        # Read fresh state written by the worker threads
+        self.db.session.refresh(job)
+        return job.to_dict()
+
+    def recover(self) -> int:
+        """
+        Reschedule jobs left behind by a restart
+
+        Queued jobs are scheduled again and stale running jobs are requeued
+        (see requeue_stale).
+
+        Returns:
+            Number of jobs scheduled
+        """
+        self.requeue_stale()
+
+        job_ids = [job.id for job in self.job_model.query.filter_by(status='queued').all()]
+        for job_id in job_ids:
+            self.executor.submit(self._run, job_id)
+        return len(job_ids)
+
+    def requeue_stale(self) -> List[str]:
+        """
+        Put running jobs that have not finished within JOB_STALE_SECONDS back in the queue
+
+        Their worker is assumed dead. Jobs that have already been tried
+        JOB_MAX_ATTEMPTS times are marked failed instead, so pollers see
+        them finish. Jobs running in this process are left alone.
+
+        Returns:
+            Ids of the jobs put back in the queue
+        """
+        stale_before = datetime.utcnow() - self.stale_after
+        with self._running_lock:
+            running_here = list(self._running)
+        stale = self.job_model.query.filter(
+            self.job_model.status == 'running',
+            self.job_model.started_at < stale_before,
+            self.job_model.id.notin_(running_here)
+        )
+
+        stale.filter(self.job_model.attempts >= self.max_attempts).update({
+            'status': 'failed',
+            'error': 'Job stopped responding and ran out of attempts',
+            'finished_at': datetime.utcnow()
+        }, synchronize_session=False)
+        job_ids = [job.id for job in stale.all()]
+        if job_ids:
+            self.job_model.query.filter(
+                self.job_model.id.in_(job_ids),
+                self.job_model.status == 'running'
+            ).update({'status': 'queued'}, synchronize_session=False)
+        self.db.session.commit()
+        return job_ids
+
+    def start_sweeper(self):
+        """
+        Requeue stale jobs every JOB_SWEEP_SECONDS while the process runs
+
+        Without it a job whose worker died is only picked up again by a restart.
+        """
+        if self._sweeper is not None or self.sweep_interval <= 0:
+            return
+        self._sweeper = threading.Thread(target=self._sweep, name='job-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def _sweep(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            with self.app.app_context():
+                try:
+                    for job_id in self.requeue_stale():
+                        print(f"Requeued stale job {job_id}")
+                        self.executor.submit(self._run, job_id)
+                except Exception as e:
+                    print(f"Error sweeping stale jobs: {e}")
+                    self.db.session.rollback()
+                finally:
+                    self.db.session.remove()
+
+    def _run(self, job_id: str):
+        """Claim and run a single job inside an application context"""
+        with self.app.app_context():
+            # Claim atomically so a job is only run once across processes
+            claimed = self.job_model.query.filter_by(id=job_id, status='queued').update({
+                'status': 'running',
+                'started_at': datetime.utcnow(),
+                'attempts': self.job_model.attempts + 1
+            }, synchronize_session=False)
+            self.db.session.commit()
+            if not claimed:
+                return
+
+            with self._running_lock:
+                self._running.add(job_id)
+            try:
+                self._execute(job_id)
+            finally:
+                with self._running_lock:
+                    self._running.discard(job_id)
+                self.db.session.remove()
+
+    def _execute(self, job_id: str):
+        """Run a claimed job's handler and store its outcome"""
+        job = self.db.session.get(self.job_model, job_id)
+        try:
+            handler = self.handlers[job.job_type]
+            result = handler(json.loads(job.payload))
+            job.result = json.dumps(result)
+            job.status = 'completed'
+        except Exception as e:
+            print(f"Error running job {job_id}: {e}")
+            self.db.session.rollback()
+            job = self.db.session.get(self.job_model, job_id)
+            job.error = str(e)
+            job.status = 'failed'
+
+        job.finished_at = datetime.utcnow()
+        try:
+            self.db.session.commit()
+        except Exception as e:
+            # The rows and status roll back together; record the failure on its own
+            print(f"Error saving job {job_id}: {e}")
+            self.db.session.rollback()
+            self._mark_failed(job_id, f"Could not save job result: {e}")
+
+    def _mark_failed(self, job_id: str, error: str):
+        """Mark a job failed, leaving it to the stale sweep if even that cannot be saved"""
+        try:
+            self.job_model.query.filter_by(id=job_id).update({
+                'status': 'failed',
+                'error': error,
+                'finished_at': datetime.utcnow()
+            }, synchronize_session=False)
+            self.db.session.commit()
+        except Exception as e:
+            print(f"Error marking job {job_id} failed: {e}")
+            self.db.session.rollback()
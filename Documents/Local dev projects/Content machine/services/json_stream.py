@@ -0,0 +1,210 @@
+import re
+import json
+from typing import List, Dict, Any, Iterable, Iterator, Optional
+
+_MEMBER_KEY = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*:\s*$', re.DOTALL)
+
+_OPENERS = {list: '[', dict: '{'}
+_CLOSERS = {']': '[', '}': '{'}
+
+
+class JSONStreamExtractor:
+    """
+    Incremental extractor for the first JSON value in model output
+
+    Text can be fed in chunks as it streams in. The extractor skips any prose
+    around the JSON, tracks nesting outside string literals, and emits every
+    object in the item array as soon as its closing brace arrives. The item
+    array is the root array itself, or the root object's ``item_key`` member.
+    A balanced value that is not valid JSON of the expected type (e.g. a
+    bracketed note in the prose) is skipped and scanning resumes inside it.
+    """
+
+    def __init__(self, root_type: type = list, item_key: Optional[str] = None):
+        """
+        Args:
+            root_type: Expected type of the value, list or dict
+            item_key: For dict roots, the member whose array items are emitted
+        """
+        if root_type not in _OPENERS:
+            raise ValueError('root_type must be list or dict')
+
+        self.root_type = root_type
+        self.item_key = item_key
+        self.result = None
+        self.done = False
+        self._buffer = ''
+        self._emitted = set()
+        self._reset(0)
+
+    def _reset(self, position: int):
+        """Start scanning for a root value at a buffer position"""
+        self._position = position
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._member_start = 0
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Consume the next chunk of text
+
+        Args:
+            chunk: Next piece of the model output
+
+        Returns:
+            Item objects completed by this chunk, in order
+        """
+        if self.done or not chunk:
+            return []
+
+        self._buffer += chunk
+        return self._scan()
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        Signal the end of the output
+
+        A root opened by a stray bracket never closes, so a still-open root
+        that produced no items is abandoned and the text after its opening
+        bracket is scanned again for a complete value. A root that did
+        produce items was real JSON cut off mid-stream and is left as is.
+
+        Returns:
+            Item objects found by the final scans
+        """
+        items = []
+        while not self.done and self._stack and not self._emitted:
+            self._reset(self._stack[0][1] + 1)
+            items.extend(self._scan())
+        return items
+
+    def _scan(self) -> List[Dict[str, Any]]:
+        """Scan the buffered text from the current position"""
+        buffer = self._buffer
+        items = []
+
+        position = self._position
+        while position < len(buffer):
+            char = buffer[position]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+
+            elif not self._stack:
+                # Prose before the root value, including its quotes, is ignored
+                if char == _OPENERS[self.root_type]:
+                    self._open(char, position)
+
+            elif char == '"':
+                self._in_string = True
+
+            elif char in '[{':
+                self._open(char, position)
+
+            elif char in _CLOSERS:
+                restart = self._close(char, position, items)
+                if self.done:
+                    position += 1
+                    break
+                if restart is not None:
+                    position = restart
+                    continue
+
+            elif char == ',' and len(self._stack) == 1:
+                self._member_start = position + 1
+
+            position += 1
+
+        self._position = position
+        return items
+
+    def _open(self, char: str, position: int):
+        """Push a container, noting whether its children are items"""
+        collects = False
+        if not self._stack:
+            collects = self.root_type is list
+            self._member_start = position + 1
+        elif char == '[' and len(self._stack) == 1 and self._stack[0][0] == '{' and self.item_key:
+            match = _MEMBER_KEY.match(self._buffer[self._member_start:position])
+            collects = match is not None and match.group(1) == self.item_key
+        self._stack.append((char, position, collects))
+
+    def _close(self, char: str, position: int, items: List[Dict[str, Any]]) -> Optional[int]:
+        """
+        Pop a container, emitting completed items and the finished root
+
+        Returns:
+            Position to resume scanning from when the root was rejected
+        """
+        opener, start, _ = self._stack.pop()
+        root_start = self._stack[0][1] if self._stack else start
+
+        if opener != _CLOSERS[char]:
+            self._reset(root_start + 1)
+            return root_start + 1
+
+        if self._stack:
+            if opener == '{' and self._stack[-1][2] and start not in self._emitted:
+                item = self._loads(start, position)
+                if isinstance(item, dict):
+                    self._emitted.add(start)
+                    items.append(item)
+            return None
+
+        value = self._loads(start, position)
+        if self._accepts(value):
+            self.result = value
+            self.done = True
+            return None
+
+        self._reset(start + 1)
+        return start + 1
+
+    def _loads(self, start: int, end: int) -> Any:
+        """Decode buffer[start:end + 1], returning None when it is not JSON"""
+        try:
+            return json.loads(self._buffer[start:end + 1])
+        except json.JSONDecodeError:
+            return None
+
+    def _accepts(self, value: Any) -> bool:
+        """Check a decoded root is the expected shape"""
+        if not isinstance(value, self.root_type):
+            return False
+        if self.root_type is list:
+            return all(isinstance(item, dict) for item in value)
+        return True
+
+
+def extract_json(content: str, root_type: type = list) -> Optional[Any]:
+    """
+    Extract the first valid JSON value of a type from model output
+
+    Args:
+        content: Full model output
+        root_type: Expected type of the value, list or dict
+
+    Returns:
+        The decoded value, or None if the output holds none
+    """
+    extractor = JSONStreamExtractor(root_type)
+    extractor.feed(content or '')
+    extractor.finish()
+    return extractor.result
+
+
+def iter_completion_text(response: Iterable[Any]) -> Iterator[str]:
+    """Yield the text deltas of a streamed chat completion"""
+    for chunk in response:
+        choices = getattr(chunk, 'choices', None)
+        if not choices:
+            continue
+        text = getattr(choices[0].delta, 'content', None)
+        if text:
+            yield text
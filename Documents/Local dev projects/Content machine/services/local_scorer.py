@@ -0,0 +1,135 @@
+import re
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Words too common to say anything about relevance
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have how in is it its of on or that the this to
+was were what when where which who why will with you your our we they their about into
+new more most than after over just not can all out up
+""".split())
+
+# Title words count this many times as often as description words
+TITLE_WEIGHT = 2
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens, dropping stopwords and single characters"""
+    return [token for token in _TOKEN_PATTERN.findall((text or '').lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+class LocalScorer:
+    """Vectorized TF-IDF relevance scoring of a whole topic batch against a niche"""
+
+    def __init__(self, prefix_weight: float = 0.5):
+        """
+        Args:
+            prefix_weight: Query weight for batch words that extend a niche word,
+                e.g. 'fitness' for the niche 'fit'
+        """
+        self.prefix_weight = prefix_weight
+
+    def score_relevance(self, topics: List[Dict[str, Any]], niche: str) -> np.ndarray:
+        """
+        Score every topic's relevance to the niche in one pass
+
+        Builds a sparse TF-IDF matrix over the batch (as row, column and
+        value arrays) and takes the cosine similarity of each row with the
+        niche query vector.
+
+        Args:
+            topics: Topics with title and description
+            niche: The client's niche
+
+        Returns:
+            Array of relevance scores from 0 to 10, one per topic
+        """
+        if not topics:
+            return np.zeros(0)
+
+        vocabulary = {}
+        rows = []
+        columns = []
+        for row, topic in enumerate(topics):
+            tokens = tokenize(topic.get('title', '')) * TITLE_WEIGHT + tokenize(topic.get('description', ''))
+            for token in tokens:
+                rows.append(row)
+                columns.append(vocabulary.setdefault(token, len(vocabulary)))
+
+        query_tokens = tokenize(niche)
+        if not rows or not query_tokens:
+            return np.zeros(len(topics))
+
+        # Collapse repeated (row, term) pairs into counts
+        document_count = len(topics)
+        vocabulary_size = len(vocabulary)
+        cells, counts = np.unique(
+            np.asarray(rows, dtype=np.int64) * vocabulary_size + np.asarray(columns, dtype=np.int64),
+            return_counts=True
+        )
+        cell_rows = cells // vocabulary_size
+        cell_columns = cells % vocabulary_size
+
+        # Sublinear term frequency and smoothed inverse document frequency
+        document_frequency = np.bincount(cell_columns, minlength=vocabulary_size)
+        idf = np.log((1 + document_count) / (1 + document_frequency)) + 1.0
+        weights = (1.0 + np.log(counts)) * idf[cell_columns]
+
+        query = self._build_query(query_tokens, vocabulary, idf)
+        if not query.any():
+            return np.zeros(document_count)
+
+        dot_products = np.bincount(cell_rows, weights=weights * query[cell_columns], minlength=document_count)
+        row_norms = np.sqrt(np.bincount(cell_rows, weights=weights ** 2, minlength=document_count))
+        query_norm = np.linalg.norm(query)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cosine = np.where(row_norms > 0, dot_products / (row_norms * query_norm), 0.0)
+
+        # Square root spreads the typically small cosines over the 0-10 range
+        return np.round(10.0 * np.sqrt(np.clip(cosine, 0.0, 1.0)), 2)
+
+    def _build_query(self, query_tokens: List[str], vocabulary: Dict[str, int],
+                     idf: np.ndarray) -> np.ndarray:
+        """Build the niche query vector over the batch vocabulary"""
+        query = np.zeros(len(vocabulary))
+        for token in set(query_tokens):
+            column = vocabulary.get(token)
+            if column is not None:
+                query[column] = idf[column]
+
+        # Also match longer forms of niche words, as the substring checks did
+        for token, column in vocabulary.items():
+            if query[column] == 0 and any(len(q) >= 3 and token.startswith(q) for q in query_tokens):
+                query[column] = self.prefix_weight * idf[column]
+        return query
+
+    def select_top_k(self, topics: List[Dict[str, Any]], niche: str, k: int,
+                     boost: Optional[np.ndarray] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], np.ndarray]:
+        """
+        Keep the k most relevant topics for expensive analysis
+
+        Args:
+            topics: Candidate topics
+            niche: The client's niche
+            k: Number of topics to keep (0 keeps all)
+            boost: Optional 0-10 scores per topic (e.g. virality) averaged with relevance
+
+        Returns:
+            Tuple of (kept topics, pruned topics, ranking score per input topic)
+        """
+        scores = self.score_relevance(topics, niche)
+        if boost is not None and len(topics):
+            scores = (scores + np.asarray(boost, dtype=float)) / 2
+        if k <= 0 or len(topics) <= k:
+            return list(topics), [], scores
+
+        # Stable sort keeps collection order among equal scores
+        order = np.argsort(-scores, kind='stable')
+        keep = set(order[:k].tolist())
+        kept = [topic for index, topic in enumerate(topics) if index in keep]
+        pruned = [topic for index, topic in enumerate(topics) if index not in keep]
+        return kept, pruned, scores
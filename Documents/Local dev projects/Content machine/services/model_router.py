@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from services.token_utils import estimate_tokens
+
+# Route value meaning "don't call a model, use the local scorer"
+LOCAL_ROUTE = 'local'
+
+# Cheap, high-volume work goes to a small model. Only the carousel itself is
+# written by the large one.
+DEFAULT_ROUTES = {
+    'topic_scoring': 'gpt-3.5-turbo',
+    'carousel': 'gpt-4',
+    'slide_repair': 'gpt-3.5-turbo'
+}
+
+# Tasks that can run without a model at all
+LOCAL_CAPABLE_TASKS = ('topic_scoring',)
+
+# USD per 1K (prompt, completion) tokens
+MODEL_PRICES = {
+    'gpt-4': (0.03, 0.06),
+    'gpt-4-turbo': (0.01, 0.03),
+    'gpt-4o': (0.005, 0.015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-3.5-turbo': (0.0015, 0.002),
+    LOCAL_ROUTE: (0.0, 0.0)
+}
+
+
+def _client_routes(client: Any) -> Dict[str, str]:
+    """Read a client's route overrides, stored as a JSON object or dict"""
+    routes = getattr(client, 'model_routes', None) if client is not None else None
+    if not routes:
+        return {}
+    if isinstance(routes, str):
+        try:
+            routes = json.loads(routes)
+        except json.JSONDecodeError:
+            print(f"Ignoring invalid model routes for client: {routes}")
+            return {}
+    return routes if isinstance(routes, dict) else {}
+
+
+def validate_routes(routes: Any) -> Dict[str, str]:
+    """
+    Check route overrides submitted for a client
+
+    Args:
+        routes: Mapping of task name to model name (or 'local')
+
+    Returns:
+        The routes, ready to store
+
+    Raises:
+        ValueError: When a task is unknown or a route is not a model name
+    """
+    if not isinstance(routes, dict):
+        raise ValueError('model_routes must be an object of task to model')
+    for task, model in routes.items():
+        if task not in DEFAULT_ROUTES:
+            raise ValueError(f"Unknown task in model_routes: {task}")
+        if not isinstance(model, str) or not model:
+            raise ValueError(f"Model for {task} must be a model name")
+        if model == LOCAL_ROUTE and task not in LOCAL_CAPABLE_TASKS:
+            raise ValueError(f"{task} cannot run on the local scorer")
+    return routes
+
+
+class ModelRouter:
+    """Pick the model for each kind of work and account for its latency and token cost"""
+
+    def __init__(self, routes: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            routes: Task to model mapping, defaults to DEFAULT_ROUTES with
+                MODEL_ROUTE_<TASK> environment overrides
+        """
+        self.routes = dict(DEFAULT_ROUTES)
+        for task in DEFAULT_ROUTES:
+            override = os.getenv(f'MODEL_ROUTE_{task.upper()}')
+            if override:
+                self.routes[task] = override
+        self.routes.update(routes or {})
+
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    def model_for(self, task: str, client: Any = None) -> str:
+        """
+        Get the model for a task, preferring the client's own rule
+
+        Args:
+            task: Task name, e.g. 'topic_scoring' or 'carousel'
+            client: Client whose model_routes override the defaults
+
+        Returns:
+            Model name, or 'local' for work the local scorer should do
+        """
+        model = _client_routes(client).get(task) or self.routes.get(task) or DEFAULT_ROUTES['carousel']
+        if model == LOCAL_ROUTE and task not in LOCAL_CAPABLE_TASKS:
+            return self.routes.get(task, DEFAULT_ROUTES[task])
+        return model
+
+    def is_local(self, task: str, client: Any = None) -> bool:
+        """Whether a task is routed to the local scorer"""
+        return self.model_for(task, client) == LOCAL_ROUTE
+
+    def record(self, task: str, model: str, messages: List[Dict[str, str]], output: str, seconds: float):
+        """
+        Record one call's latency and estimated token cost for its route
+
+        Streamed responses carry no usage block, so tokens are estimated
+        from the prompt messages and the output text.
+
+        Args:
+            task: Task name
+            model: Model that served the call
+            messages: Prompt messages sent
+            output: Text or function arguments returned
+            seconds: Wall time of the call, including reading the stream
+        """
+        prompt_tokens = sum(estimate_tokens(message.get('content') or '', model) for message in messages)
+        completion_tokens = estimate_tokens(output or '', model)
+        prompt_price, completion_price = MODEL_PRICES.get(model, MODEL_PRICES['gpt-4'])
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+        with self._lock:
+            usage = self._usage.setdefault((task, model), {
+                'calls': 0, 'seconds': 0.0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0
+            })
+            usage['calls'] += 1
+            usage['seconds'] += seconds
+            usage['prompt_tokens'] += prompt_tokens
+            usage['completion_tokens'] += completion_tokens
+            usage['cost_usd'] += cost
+
+    def track_stream(self, task: str, model: str, messages: List[Dict[str, str]],
+                     chunks: Iterable[str], started: Optional[float] = None) -> Iterator[str]:
+        """
+        Pass a streamed call's text through, recording the route's usage once it ends
+
+        Args:
+            task: Task name
+            model: Model serving the stream
+            messages: Prompt messages sent
+            chunks: Text deltas of the response
+            started: time.perf_counter() before the request was sent
+        """
+        started = started or time.perf_counter()
+        output = []
+        for chunk in chunks:
+            output.append(chunk)
+            yield chunk
+        self.record(task, model, messages, ''.join(output), time.perf_counter() - started)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get call counts, mean latency, tokens and cost per route ('task:model')"""
+        with self._lock:
+            usage = {key: dict(value) for key, value in self._usage.items()}
+
+        stats = {}
+        for (task, model), values in sorted(usage.items()):
+            values['mean_seconds'] = round(values['seconds'] / values['calls'], 4)
+            values['seconds'] = round(values['seconds'], 4)
+            values['cost_usd'] = round(values['cost_usd'], 6)
+            stats[f'{task}:{model}'] = values
+        return stats
+
+
+_router = None
+
+
+def get_model_router() -> ModelRouter:
+    """Get the process-wide router so every service reports into the same stats"""
+    global _router
+    if _router is None:
+        _router = ModelRouter()
+    return _router
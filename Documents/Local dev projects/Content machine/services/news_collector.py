@@ -1,22 +1,30 @@
 import requests
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
 from datetime import datetime, timedelta
 import json
 from newsapi import NewsApiClient
 from gnews import GNews
+from services.rate_limiter import get_rate_limiter
+from services.cache import get_topic_cache
+from services.http_session import get_http_session
+from services.dedup import get_detector
 
 class NewsCollector:
     """Service for collecting trending topics from news sources"""
     
-    def __init__(self):
+    def __init__(self, topic_cache=None):
+        # Collected topics are cached per (source, niche) in front of each API
+        self.topic_cache = topic_cache or get_topic_cache()
+        
         # Initialize news APIs with free tier keys
         self.newsapi_key = os.getenv('NEWSAPI_KEY')
         self.gnews = GNews(language='en', country='US', max_results=20)
         
-        # Fallback to NewsAPI if GNews fails
+        # Fallback to NewsAPI if GNews fails (GNews reads RSS through feedparser,
+        # so only NewsAPI can use the shared connection pools)
         if self.newsapi_key:
-            self.newsapi = NewsApiClient(api_key=self.newsapi_key)
+            self.newsapi = NewsApiClient(api_key=self.newsapi_key, session=get_http_session('newsapi'))
         else:
             self.newsapi = None
     
@@ -33,31 +41,40 @@ class NewsCollector:
         topics = []
         
         try:
-            # Try GNews first (free tier)
-            gnews_topics = self._get_gnews_topics(niche)
-            topics.extend(gnews_topics)
-            
-            # Try NewsAPI if available
-            if self.newsapi:
-                newsapi_topics = self._get_newsapi_topics(niche)
-                topics.extend(newsapi_topics)
+            # Fetch each source in turn (GNews first, then NewsAPI if available)
+            for fetch_topics in self.get_source_fetchers().values():
+                topics.extend(fetch_topics(niche))
             
-            # Add fallback topics if no results
-            if not topics:
-                topics = self._get_fallback_topics(niche)
-            
-            # Remove duplicates and limit results
-            unique_topics = self._deduplicate_topics(topics)
-            return unique_topics[:15]  # Return top 15 topics
+            return self.finalize_topics(topics, niche)
             
         except Exception as e:
             print(f"Error collecting news topics: {e}")
             return self._get_fallback_topics(niche)
     
+    def get_source_fetchers(self) -> Dict[str, Callable[[str], List[Dict[str, Any]]]]:
+        """Get the cached per-source fetch functions, keyed by source name"""
+        fetchers = {'gnews': self.topic_cache.wrap('gnews', self._get_gnews_topics)}
+        
+        if self.newsapi:
+            fetchers['newsapi'] = self.topic_cache.wrap('newsapi', self._get_newsapi_topics)
+        
+        return fetchers
+    
+    def finalize_topics(self, topics: List[Dict[str, Any]], niche: str) -> List[Dict[str, Any]]:
+        """Apply fallback topics, deduplication and the result limit to collected topics"""
+        # Add fallback topics if no results
+        if not topics:
+            topics = self._get_fallback_topics(niche)
+        
+        # Remove duplicates and limit results
+        unique_topics = self._deduplicate_topics(topics)
+        return unique_topics[:15]  # Return top 15 topics
+    
     def _get_gnews_topics(self, niche: str) -> List[Dict[str, Any]]:
         """Get topics from GNews API"""
         try:
             # Search for niche-related news
+            get_rate_limiter('gnews').acquire()
             articles = self.gnews.get_news(niche)
             
             topics = []
@@ -89,6 +106,7 @@ class NewsCollector:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=7)
             
+            get_rate_limiter('newsapi').acquire()
             response = self.newsapi.get_everything(
                 q=niche,
                 from_param=start_date.strftime('%Y-%m-%d'),
@@ -182,43 +200,14 @@ class NewsCollector:
         return min(relevance_score, 10.0)
     
     def _deduplicate_topics(self, topics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate topics based on title similarity"""
-        unique_topics = []
-        seen_titles = set()
-        
-        for topic in topics:
-            title = topic.get('title', '').lower()
-            
-            # Check if similar title already exists
-            is_duplicate = False
-            for seen_title in seen_titles:
-                if self._similarity_score(title, seen_title) > 0.8:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                unique_topics.append(topic)
-                seen_titles.add(title)
-        
-        return unique_topics
-    
-    def _similarity_score(self, title1: str, title2: str) -> float:
-        """Calculate similarity between two titles using simple word overlap"""
-        words1 = set(title1.split())
-        words2 = set(title2.split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union)
+        """Remove duplicate topics based on title similarity (Jaccard above 0.8)"""
+        return get_detector(0.8).deduplicate(topics)
     
     def get_trending_keywords(self, niche: str) -> List[str]:
         """Get trending keywords related to the niche"""
         try:
             # Use GNews to get trending keywords
+            get_rate_limiter('gnews').acquire()
             articles = self.gnews.get_news(niche)
             
             keywords = []
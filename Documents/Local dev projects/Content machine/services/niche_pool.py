@@ -0,0 +1,168 @@
+import os
+import threading
+import numpy as np
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from sqlalchemy import select
+from services.local_scorer import LocalScorer
+from services.retention import normalize_niche
+from services.single_flight import SingleFlight
+
+
+class NicheTopicPool:
+    """
+    Service for collecting and scoring each niche's topics once per refresh window
+
+    Clients in the same niche, scored by the same model, share one pool of
+    topic rows. Only the client's own relevance and overall scores are
+    stored per client.
+    """
+
+    def __init__(self, db: Any, topic_model: Any, writer: Any, refresh_seconds: Optional[int] = None,
+                 pool_size: Optional[int] = None, client_weight: Optional[float] = None,
+                 retry_seconds: Optional[int] = None):
+        """
+        Args:
+            db: Flask-SQLAlchemy instance
+            topic_model: NicheTopic model class
+            writer: BulkWriter that stores pool rows
+            refresh_seconds: Age after which a niche's pool is collected again
+            pool_size: Most ranked topics kept per pool
+            client_weight: Share (0-1) of a client's relevance taken from its
+                audience and goals rather than from the niche
+            retry_seconds: Age after which a pool the model failed to score is
+                collected again, so one failed call isn't shared all window
+        """
+        self.db = db
+        self.topic_model = topic_model
+        self.writer = writer
+        if refresh_seconds is None:
+            refresh_seconds = int(os.getenv('NICHE_POOL_REFRESH_SECONDS', '3600'))
+        self.refresh_window = timedelta(seconds=refresh_seconds)
+        if retry_seconds is None:
+            retry_seconds = int(os.getenv('NICHE_POOL_RETRY_SECONDS', '300'))
+        self.retry_window = timedelta(seconds=min(retry_seconds, refresh_seconds))
+        self.pool_size = pool_size or int(os.getenv('NICHE_POOL_SIZE', '30'))
+        if client_weight is None:
+            client_weight = float(os.getenv('CLIENT_RELEVANCE_WEIGHT', '0.3'))
+        self.client_weight = min(max(client_weight, 0.0), 1.0)
+        self.local_scorer = LocalScorer()
+
+        # Clients of a niche asking at the same time wait for one collection.
+        # A collection still running after a whole refresh window is taken
+        # as stuck, and later callers start their own.
+        self._refreshes = SingleFlight(max_age=max(refresh_seconds, 1))
+        self._stats = {'hits': 0, 'refreshes': 0}
+        self._lock = threading.Lock()
+
+    def get_topics(self, niche: str, scoring_model: str,
+                   collect: Callable[[str], Tuple[List[Dict[str, Any]], bool]]) -> List[Any]:
+        """
+        Get a niche's current pool, collecting it first when it is missing or stale
+
+        A refreshed pool is committed straight away, apart from the caller's
+        transaction, so other clients and processes can read it.
+
+        Args:
+            niche: Niche as the client wrote it
+            scoring_model: Model that scores the pool, part of the pool's key
+            collect: Called with the normalized niche to collect, merge and
+                score its topics; returns them ranked, and whether the model
+                failed and some got fallback scores
+
+        Returns:
+            The pool's topic rows, highest overall score first
+        """
+        niche = normalize_niche(niche)
+        collected_at = self._fresh_pool(niche, scoring_model)
+        if collected_at is None:
+            collected_at = self._refreshes.do(
+                (niche, scoring_model), lambda: self._refresh(niche, scoring_model, collect)
+            )
+        else:
+            self._count('hits')
+
+        if collected_at is None:
+            return []
+        return self.topic_model.query.filter_by(
+            niche=niche, scoring_model=scoring_model, collected_at=collected_at
+        ).order_by(self.topic_model.overall_score.desc(), self.topic_model.id).all()
+
+    def _fresh_pool(self, niche: str, scoring_model: str) -> Optional[datetime]:
+        """Collection time of the niche's latest pool, or None when it is missing or stale"""
+        latest = self.db.session.execute(
+            select(self.topic_model.collected_at, self.topic_model.fallback_scored).where(
+                self.topic_model.niche == niche,
+                self.topic_model.scoring_model == scoring_model
+            ).order_by(self.topic_model.collected_at.desc()).limit(1)
+        ).first()
+        if latest is None:
+            return None
+        collected_at, fallback_scored = latest
+        window = self.retry_window if fallback_scored else self.refresh_window
+        if datetime.utcnow() - collected_at >= window:
+            return None
+        return collected_at
+
+    def _refresh(self, niche: str, scoring_model: str,
+                 collect: Callable[[str], Tuple[List[Dict[str, Any]], bool]]) -> Optional[datetime]:
+        """Collect and store a new pool, unless another caller just did"""
+        # A caller that found the pool stale may arrive after the refresh finished
+        collected_at = self._fresh_pool(niche, scoring_model)
+        if collected_at is not None:
+            return collected_at
+
+        topics, fallback_scored = collect(niche)
+        topics = topics[:self.pool_size]
+        if not topics:
+            return None
+
+        collected_at = datetime.utcnow()
+        self.writer.save_niche_topics(niche, scoring_model, topics, collected_at, fallback_scored)
+        self.db.session.commit()
+        self._count('refreshes')
+        return collected_at
+
+    def score_for_client(self, client: Any, pool: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Rank a niche pool for one client
+
+        The client's relevance blends the pool's niche relevance with the
+        local TF-IDF relevance of each topic to the client's target audience
+        and goals.
+
+        Args:
+            client: Client the topics are ranked for
+            pool: Pool rows from get_topics
+
+        Returns:
+            Topic dictionaries with the client's scores, highest overall score first
+        """
+        topics = [row.to_dict() for row in pool]
+        if not topics:
+            return []
+
+        niche_relevance = np.array([topic['relevance_score'] for topic in topics], dtype=float)
+        profile = ' '.join(filter(None, [getattr(client, 'target_audience', ''),
+                                         getattr(client, 'goals', '')]))
+        if profile and self.client_weight:
+            profile_relevance = self.local_scorer.score_relevance(topics, profile)
+            relevance = (1 - self.client_weight) * niche_relevance + self.client_weight * profile_relevance
+        else:
+            relevance = niche_relevance
+
+        for topic, score in zip(topics, relevance.tolist()):
+            topic['relevance_score'] = round(score, 2)
+            topic['overall_score'] = round((topic['virality_score'] + score) / 2, 2)
+
+        topics.sort(key=lambda topic: topic['overall_score'], reverse=True)
+        return topics
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get counts of pool reads served from a fresh pool and of collections"""
+        with self._lock:
+            return dict(self._stats)
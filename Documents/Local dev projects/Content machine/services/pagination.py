@@ -0,0 +1,102 @@
+import json
+import base64
+from datetime import datetime
+from typing import List, Any, Optional, Tuple
+
+# Most rows a caller can ask for in one page
+MAX_PAGE_SIZE = 100
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(sort_value: Any, row_id: int) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor"""
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    payload = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_type: type) -> Tuple[Any, int]:
+    """
+    Decode a cursor made by encode_cursor
+
+    Args:
+        cursor: Cursor from a previous page
+        sort_type: Python type of the sort column, e.g. float or datetime
+
+    Returns:
+        (sort value, row id) of the last row already returned
+
+    Raises:
+        CursorError: When the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if sort_type is datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        elif sort_value is not None:
+            sort_value = sort_type(sort_value)
+        if not isinstance(row_id, int) or isinstance(row_id, bool):
+            raise TypeError('row id must be an integer')
+    except (ValueError, TypeError, UnicodeError):
+        raise CursorError('Invalid cursor')
+    return sort_value, row_id
+
+
+def parse_page_size(value: Optional[str], default: int) -> int:
+    """Read a limit query parameter, clamped to 1..MAX_PAGE_SIZE"""
+    try:
+        limit = int(value) if value else default
+    except ValueError:
+        raise CursorError('limit must be an integer')
+    return min(max(limit, 1), MAX_PAGE_SIZE)
+
+
+def keyset_page(query: Any, sort_column: Any, id_column: Any,
+                cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Fetch one page of a query ordered by sort_column, then id, both descending
+
+    The next page starts after the last row's (sort value, id) instead of at
+    an offset. It is read as two index seeks, the rest of the last row's
+    sort value and then lower sort values, because SQLite only seeks on the
+    first column of an OR or row-value comparison. With an index on
+    (filter columns, sort_column, id) every page costs the same however
+    deep it is.
+
+    Args:
+        query: Filtered query, without ordering or limit
+        sort_column: Column the rows are ordered by
+        id_column: Unique column breaking ties in sort_column
+        cursor: Cursor from the previous page, or None for the first page
+        limit: Rows per page
+
+    Returns:
+        (rows, cursor for the next page or None when there are no more rows)
+
+    Raises:
+        CursorError: When the cursor is malformed
+    """
+    ordering = (sort_column.desc(), id_column.desc())
+
+    # One extra row tells whether another page exists
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column.type.python_type)
+        rows = query.filter(sort_column == sort_value, id_column < row_id).order_by(
+            *ordering).limit(limit + 1).all()
+        if len(rows) <= limit and sort_value is not None:
+            rows += query.filter(sort_column < sort_value).order_by(
+                *ordering).limit(limit + 1 - len(rows)).all()
+    else:
+        rows = query.order_by(*ordering).limit(limit + 1).all()
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
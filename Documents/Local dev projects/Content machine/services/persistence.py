@@ -0,0 +1,146 @@
+import os
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import insert, select
+
+
+class BulkWriter:
+    """
+    Service for storing pipeline output with bulk INSERTs
+
+    One cached Core INSERT is executed with a list of rows per batch, which
+    skips the ORM unit of work. SQLAlchemy sends the batch as executemany on
+    SQLite and as multi-row VALUES on PostgreSQL.
+
+    Rows are written inside the caller's session transaction and are not
+    committed here, so a job's rows and its status commit together.
+    """
+
+    def __init__(self, db: Any, topic_model: Any, score_model: Any, content_model: Any,
+                 batch_size: Optional[int] = None):
+        """
+        Args:
+            db: Flask-SQLAlchemy instance
+            topic_model: NicheTopic model class
+            score_model: ClientTopicScore model class
+            content_model: GeneratedContent model class
+            batch_size: Rows sent to the database per execute
+        """
+        self.db = db
+        self.topic_model = topic_model
+        self.score_model = score_model
+        self.content_model = content_model
+        self.batch_size = batch_size or int(os.getenv('PERSIST_BATCH_SIZE', '500'))
+
+    def insert_rows(self, model: Any, rows: List[Dict[str, Any]]) -> int:
+        """
+        Insert rows in batches of batch_size
+
+        Args:
+            model: Model class whose table receives the rows
+            rows: Column values per row, every row with the same keys
+
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+
+        statement = insert(model.__table__)
+        for start in range(0, len(rows), self.batch_size):
+            self.db.session.execute(statement, rows[start:start + self.batch_size])
+        return len(rows)
+
+    def save_niche_topics(self, niche: str, scoring_model: str, topics: List[Dict[str, Any]],
+                          collected_at: datetime, fallback_scored: bool = False) -> int:
+        """
+        Store a niche's pool of analyzed topics
+
+        Args:
+            niche: Normalized niche
+            scoring_model: Model that scored the topics
+            topics: Analyzed topic dictionaries
+            collected_at: Collection time shared by the whole pool
+            fallback_scored: Whether the model failed and some topics were scored locally
+
+        Returns:
+            Number of rows inserted
+        """
+        rows = [
+            {
+                'niche': niche,
+                'scoring_model': scoring_model,
+                'title': topic['title'],
+                'description': topic['description'],
+                'source': topic['source'],
+                'url': topic.get('url'),
+                'virality_score': topic['virality_score'],
+                'relevance_score': topic['relevance_score'],
+                'overall_score': topic['overall_score'],
+                'keywords': topic.get('keywords') or [],
+                'sentiment': topic.get('sentiment'),
+                'collected_at': collected_at,
+                'fallback_scored': fallback_scored
+            }
+            for topic in topics
+        ]
+        return self.insert_rows(self.topic_model, rows)
+
+    def save_client_scores(self, client_id: int, topics: List[Dict[str, Any]]) -> int:
+        """
+        Store a client's scores for pool topics it has not been scored on yet
+
+        Args:
+            client_id: Client the scores belong to
+            topics: Pool topic dictionaries (with their id) carrying the client's scores
+
+        Returns:
+            Number of rows inserted
+        """
+        scores = self.score_model
+        topic_ids = [topic['id'] for topic in topics]
+        existing = set(self.db.session.execute(
+            select(scores.topic_id).where(scores.client_id == client_id, scores.topic_id.in_(topic_ids))
+        ).scalars())
+
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                'client_id': client_id,
+                'topic_id': topic['id'],
+                'relevance_score': topic['relevance_score'],
+                'overall_score': topic['overall_score'],
+                'created_at': created_at
+            }
+            for topic in topics if topic['id'] not in existing
+        ]
+        return self.insert_rows(scores, rows)
+
+    def save_generated_content(self, client_id: int,
+                               posts: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+                               content_type: str = 'instagram_carousel') -> int:
+        """
+        Store generated posts for a client
+
+        Args:
+            client_id: Owning client
+            posts: (topic, post content) pairs
+            content_type: Kind of content generated
+
+        Returns:
+            Number of rows inserted
+        """
+        created_at = datetime.utcnow()
+        rows = [
+            {
+                'client_id': client_id,
+                'topic_id': topic.get('id'),
+                'content_type': content_type,
+                'content': post,
+                'status': 'draft',
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+            for topic, post in posts
+        ]
+        return self.insert_rows(self.content_model, rows)
@@ -0,0 +1,152 @@
+import os
+import time
+import threading
+from typing import Dict, Any, Optional
+
+# Default budgets per upstream as (requests, per seconds). Override with
+# RATE_LIMIT_<UPSTREAM>=<requests>/<seconds>, e.g. RATE_LIMIT_REDDIT=60/60
+DEFAULT_RATE_LIMITS = {
+    'reddit': (60, 60),         # Reddit OAuth clients get ~100 requests per minute
+    'twitter': (450, 900),      # Twitter v2 recent search app limit per 15 minutes
+    'gnews': (60, 60),          # GNews scrapes Google News RSS, stay polite
+    'newsapi': (100, 86400)     # NewsAPI developer plan daily quota
+}
+
+# Longest a caller will block for a token before giving up
+DEFAULT_MAX_WAIT = 5.0
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a token is not available within the allowed wait time"""
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket that only blocks once the budget is spent"""
+
+    def __init__(self, name: str, capacity: float, refill_rate: float,
+                 max_wait: float = DEFAULT_MAX_WAIT):
+        """
+        Args:
+            name: Upstream name, used in errors and stats
+            capacity: Maximum number of tokens (burst size)
+            refill_rate: Tokens added per second
+            max_wait: Default longest time acquire() will block
+        """
+        self.name = name
+        self.capacity = float(capacity)
+        self.refill_rate = float(refill_rate)
+        self.max_wait = max_wait
+
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        self._acquired = 0
+        self._throttled = 0
+        self._rejected = 0
+        self._throttled_seconds = 0.0
+
+    def acquire(self, tokens: float = 1, max_wait: Optional[float] = None) -> float:
+        """
+        Take tokens from the bucket, waiting only if the budget is exhausted
+
+        Args:
+            tokens: Number of tokens to take
+            max_wait: Longest time to block, defaults to the bucket's max_wait
+
+        Returns:
+            Seconds spent waiting for the tokens
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+
+        with self._lock:
+            self._refill()
+
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self._acquired += 1
+                return 0.0
+
+            wait_time = (tokens - self._tokens) / self.refill_rate
+            if wait_time > max_wait:
+                self._rejected += 1
+                raise RateLimitExceeded(
+                    f"{self.name} rate limit exhausted, next token in {wait_time:.1f}s"
+                )
+
+            # Reserve the tokens now so concurrent callers queue up behind us
+            self._tokens -= tokens
+            self._acquired += 1
+            self._throttled += 1
+            self._throttled_seconds += wait_time
+
+        time.sleep(wait_time)
+        return wait_time
+
+    def _refill(self):
+        """Add tokens accrued since the last update (caller holds the lock)"""
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.refill_rate)
+        self._updated_at = now
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get usage and throttling counters for this bucket"""
+        with self._lock:
+            self._refill()
+            return {
+                'available_tokens': round(max(self._tokens, 0.0), 2),
+                'capacity': self.capacity,
+                'acquired': self._acquired,
+                'throttled': self._throttled,
+                'rejected': self._rejected,
+                'throttled_seconds': round(self._throttled_seconds, 3)
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def _parse_rate_limit(upstream: str):
+    """Read the (requests, seconds) budget for an upstream from the environment"""
+    configured = os.getenv(f'RATE_LIMIT_{upstream.upper()}')
+    if configured:
+        try:
+            requests_allowed, seconds = configured.split('/')
+            return float(requests_allowed), float(seconds)
+        except ValueError:
+            print(f"Invalid RATE_LIMIT_{upstream.upper()} value: {configured}")
+    return DEFAULT_RATE_LIMITS.get(upstream, (60, 60))
+
+
+def get_rate_limiter(upstream: str) -> TokenBucket:
+    """
+    Get the process-wide rate limiter for an upstream
+
+    Args:
+        upstream: Upstream name such as 'reddit', 'twitter', 'gnews' or 'newsapi'
+
+    Returns:
+        Shared TokenBucket for the upstream
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(upstream)
+        if limiter is None:
+            requests_allowed, seconds = _parse_rate_limit(upstream)
+            limiter = TokenBucket(
+                name=upstream,
+                capacity=requests_allowed,
+                refill_rate=requests_allowed / seconds,
+                max_wait=float(os.getenv('RATE_LIMIT_MAX_WAIT', DEFAULT_MAX_WAIT))
+            )
+            _limiters[upstream] = limiter
+        return limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Get throttling stats for every upstream limiter created so far"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {name: limiter.get_stats() for name, limiter in limiters.items()}
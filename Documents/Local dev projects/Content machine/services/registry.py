@@ -0,0 +1,166 @@
+import os
+import time
+import hashlib
+import threading
+from typing import Dict, Any, Callable, Tuple
+from services.single_flight import get_coalescing_stats
+from services.model_router import get_model_router
+
+# Credentials each service reads when it builds its API clients. A change to
+# any of them makes the registry rebuild that service on next use.
+SERVICE_CREDENTIALS = {
+    'news_collector': ('NEWSAPI_KEY',),
+    'social_collector': ('REDDIT_CLIENT_ID', 'REDDIT_CLIENT_SECRET', 'REDDIT_USER_AGENT',
+                         'TWITTER_BEARER_TOKEN', 'TWITTER_API_KEY', 'TWITTER_API_SECRET'),
+    'trend_analyzer': ('OPENAI_API_KEY',),
+    'content_generator': ('OPENAI_API_KEY',)
+}
+
+
+def _build_news_collector():
+    from services.news_collector import NewsCollector
+    return NewsCollector()
+
+
+def _build_social_collector():
+    from services.social_collector import SocialCollector
+    return SocialCollector()
+
+
+def _build_trend_analyzer():
+    from services.trend_analyzer import TrendAnalyzer
+    return TrendAnalyzer()
+
+
+def _build_content_generator():
+    from services.content_generator import ContentGenerator
+    return ContentGenerator()
+
+
+SERVICE_FACTORIES = {
+    'news_collector': _build_news_collector,
+    'social_collector': _build_social_collector,
+    'trend_analyzer': _build_trend_analyzer,
+    'content_generator': _build_content_generator
+}
+
+
+def _credentials_fingerprint(env_names: Tuple[str, ...]) -> str:
+    """Hash the current values of credential environment variables"""
+    values = '\0'.join(os.getenv(name, '') for name in env_names)
+    return hashlib.sha256(values.encode('utf-8')).hexdigest()
+
+
+class ServiceRegistry:
+    """Lazily built, per-container service instances reused across invocations"""
+
+    def __init__(self, factories: Dict[str, Callable[[], Any]] = None,
+                 credentials: Dict[str, Tuple[str, ...]] = None):
+        """
+        Args:
+            factories: Functions building each service, keyed by service name
+            credentials: Environment variables each service's clients depend on
+        """
+        self.factories = factories or SERVICE_FACTORIES
+        self.credentials = credentials or SERVICE_CREDENTIALS
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """
+        Get a service, building it on first use or after its credentials change
+
+        Args:
+            name: Service name, e.g. 'news_collector' or 'trend_analyzer'
+
+        Returns:
+            The shared service instance
+        """
+        fingerprint = _credentials_fingerprint(self.credentials.get(name, ()))
+
+        with self._lock:
+            entry = self._services.get(name)
+            if entry is not None and entry['fingerprint'] == fingerprint:
+                return entry['service']
+
+            if entry is not None:
+                print(f"Credentials for {name} changed, rebuilding service")
+            return self._build(name, fingerprint)['service']
+
+    def rebuild(self, name: str) -> Any:
+        """Force a service to be rebuilt, e.g. after rotating a key"""
+        fingerprint = _credentials_fingerprint(self.credentials.get(name, ()))
+        with self._lock:
+            return self._build(name, fingerprint)['service']
+
+    def _build(self, name: str, fingerprint: str) -> Dict[str, Any]:
+        """Build a service and record how long it took (caller holds the lock)"""
+        if name not in self.factories:
+            raise KeyError(f"Unknown service: {name}")
+
+        started = time.perf_counter()
+        service = self.factories[name]()
+        entry = {
+            'service': service,
+            'fingerprint': fingerprint,
+            'built_at': time.time(),
+            'build_seconds': time.perf_counter() - started
+        }
+        self._services[name] = entry
+        return entry
+
+    def health_check(self) -> Dict[str, Any]:
+        """
+        Report which services are warm and whether their clients are configured
+
+        Returns:
+            Per-service health details and an overall 'healthy' flag
+        """
+        with self._lock:
+            entries = dict(self._services)
+
+        services = {}
+        for name in self.factories:
+            entry = entries.get(name)
+            if entry is None:
+                services[name] = {'initialized': False, 'healthy': True}
+                continue
+
+            fingerprint = _credentials_fingerprint(self.credentials.get(name, ()))
+            clients = self._describe_clients(entry['service'])
+            services[name] = {
+                'initialized': True,
+                'healthy': fingerprint == entry['fingerprint'],
+                'credentials_current': fingerprint == entry['fingerprint'],
+                'age_seconds': round(time.time() - entry['built_at'], 1),
+                'build_seconds': round(entry['build_seconds'], 4),
+                'clients': clients
+            }
+
+        return {
+            'healthy': all(service['healthy'] for service in services.values()),
+            'services': services,
+            'openai_coalescing': get_coalescing_stats(),
+            'model_routes': get_model_router().get_stats()
+        }
+
+    def _describe_clients(self, service: Any) -> Dict[str, bool]:
+        """Report which upstream clients a service has configured"""
+        clients = {}
+        for attribute in ('openai_client', 'newsapi', 'gnews', 'reddit_client', 'twitter_client'):
+            if hasattr(service, attribute):
+                clients[attribute] = getattr(service, attribute) is not None
+        return clients
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ServiceRegistry:
+    """Get the registry shared by every invocation in this container"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ServiceRegistry()
+        return _registry
@@ -0,0 +1,217 @@
+import os
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Any, Optional
+from sqlalchemy import delete, func, insert, select, update
+
+
+def normalize_niche(niche: str) -> str:
+    """Key clients' free-text niches the same way when grouping them"""
+    return ' '.join((niche or '').lower().split())
+
+
+def _as_date(value: Any) -> date:
+    """func.date() gives a string on SQLite and a date on PostgreSQL"""
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+class TopicRetention:
+    """
+    Service for rolling raw niche topics up into daily per-niche aggregates
+    and pruning raw rows past the retention window
+
+    Per-client trending topics stored before niche pools are rolled up under
+    their client's niche alongside them until they are pruned.
+
+    Work runs inside the caller's session transaction and is not committed
+    here, so a retention job's rollups and deletes land together.
+    """
+
+    def __init__(self, db: Any, topic_model: Any, score_model: Any, rollup_model: Any,
+                 content_model: Any, legacy_topic_model: Any = None, client_model: Any = None,
+                 retention_days: Optional[int] = None):
+        """
+        Args:
+            db: Flask-SQLAlchemy instance
+            topic_model: NicheTopic model class
+            score_model: ClientTopicScore model class, deleted with pruned topics
+            rollup_model: TopicRollup model class
+            content_model: GeneratedContent model class, unlinked from pruned topics
+            legacy_topic_model: TrendingTopic model class, whose old per-client
+                rows are rolled up and pruned on the same window
+            client_model: Client model class, giving legacy rows their niche
+            retention_days: Days of raw topic rows to keep
+        """
+        self.db = db
+        self.topic_model = topic_model
+        self.score_model = score_model
+        self.rollup_model = rollup_model
+        self.content_model = content_model
+        self.legacy_topic_model = legacy_topic_model
+        self.client_model = client_model
+        self.retention_days = retention_days or int(os.getenv('TOPIC_RETENTION_DAYS', '30'))
+
+    def run(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Refresh rollups from raw rows, then prune raw rows older than the window
+
+        Args:
+            today: Current UTC date, defaults to now
+
+        Returns:
+            Days rolled up, rollup rows written and raw rows pruned
+        """
+        today = today or datetime.utcnow().date()
+        rolled_days, rollups_written = self.rollup()
+
+        cutoff = datetime.combine(today - timedelta(days=self.retention_days), time.min)
+        pruned = self.prune(cutoff)
+        return {
+            'rolled_up_days': rolled_days,
+            'rollups_written': rollups_written,
+            'pruned_topics': pruned,
+            'retention_days': self.retention_days
+        }
+
+    def rollup(self):
+        """
+        Recompute the rollups of every day that may have gained raw rows
+
+        That is the latest rolled-up day, which may have been partial when
+        it was rolled up, and every day after it. Earlier days are final, and
+        so is any day whose raw rows have been pruned.
+
+        Returns:
+            (days rolled up, rollup rows written)
+        """
+        session = self.db.session
+        topic = self.topic_model
+        rollup = self.rollup_model
+
+        legacy = self.legacy_topic_model if self.client_model is not None else None
+
+        start_day = session.execute(select(func.max(rollup.day))).scalar()
+        if start_day is None:
+            first_rows = [session.execute(select(func.min(topic.collected_at))).scalar()]
+            if legacy is not None:
+                first_rows.append(session.execute(select(func.min(legacy.created_at))).scalar())
+            first_rows = [first_row for first_row in first_rows if first_row is not None]
+            if not first_rows:
+                return 0, 0
+            start_day = min(first_rows).date()
+        start_day = _as_date(start_day)
+        since = datetime.combine(start_day, time.min)
+
+        day = func.date(topic.collected_at)
+        grouped = session.execute(
+            select(topic.niche, day, topic.source, func.count(topic.id),
+                   func.sum(topic.overall_score), func.max(topic.overall_score))
+            .where(topic.collected_at >= since)
+            .group_by(topic.niche, day, topic.source)
+        ).all()
+        if legacy is not None:
+            client = self.client_model
+            day = func.date(legacy.created_at)
+            grouped += session.execute(
+                select(client.niche, day, legacy.source, func.count(legacy.id),
+                       func.sum(legacy.overall_score), func.max(legacy.overall_score))
+                .join(client, client.id == legacy.client_id)
+                .where(legacy.created_at >= since)
+                .group_by(client.niche, day, legacy.source)
+            ).all()
+
+        rollups = {}
+        for niche, row_day, source, count, score_sum, max_score in grouped:
+            if row_day is None:
+                continue
+            key = (normalize_niche(niche), _as_date(row_day))
+            values = rollups.setdefault(key, {
+                'niche': key[0], 'day': key[1], 'topic_count': 0, 'score_sum': 0.0,
+                'max_score': max_score, 'source_counts': {}, 'created_at': datetime.utcnow()
+            })
+            values['topic_count'] += count
+            values['score_sum'] += score_sum or 0.0
+            values['max_score'] = max(values['max_score'], max_score)
+            values['source_counts'][source] = values['source_counts'].get(source, 0) + count
+
+        # Only replace days that still have raw rows; a day pruned since it was
+        # rolled up keeps its rollup
+        rolled_days = sorted({key[1] for key in rollups})
+        if rolled_days:
+            session.execute(delete(rollup).where(rollup.day.in_(rolled_days)))
+            session.execute(insert(rollup.__table__), list(rollups.values()))
+        return len(rolled_days), len(rollups)
+
+    def prune(self, cutoff: datetime) -> int:
+        """
+        Delete raw topic rows, and clients' scores for them, collected before cutoff
+
+        Generated content keeps its post but loses the link to a pruned topic.
+
+        Returns:
+            Number of topic rows deleted
+        """
+        session = self.db.session
+        topic = self.topic_model
+        expired = select(topic.id).where(topic.collected_at < cutoff)
+        unsynchronized = {'synchronize_session': False}
+
+        session.execute(
+            update(self.content_model)
+            .where(self.content_model.topic_id.in_(expired))
+            .values(topic_id=None),
+            execution_options=unsynchronized
+        )
+        session.execute(delete(self.score_model).where(self.score_model.topic_id.in_(expired)),
+                        execution_options=unsynchronized)
+        result = session.execute(delete(topic).where(topic.collected_at < cutoff),
+                                 execution_options=unsynchronized)
+
+        if self.legacy_topic_model is not None:
+            legacy = self.legacy_topic_model
+            expired_legacy = select(legacy.id).where(legacy.created_at < cutoff)
+            session.execute(
+                update(self.content_model)
+                .where(self.content_model.legacy_topic_id.in_(expired_legacy))
+                .values(legacy_topic_id=None),
+                execution_options=unsynchronized
+            )
+            session.execute(delete(legacy).where(legacy.created_at < cutoff),
+                            execution_options=unsynchronized)
+        return result.rowcount or 0
+
+    def summary(self, niche: str, days: int, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Trending activity for a niche over the last N days, read from rollups
+
+        Args:
+            niche: Niche, matched case- and whitespace-insensitively
+            days: Days to cover, today included
+            today: Current UTC date, defaults to now
+
+        Returns:
+            Totals over the period plus the rollup of each day
+        """
+        today = today or datetime.utcnow().date()
+        since = today - timedelta(days=days - 1)
+        rollups = self.rollup_model.query.filter(
+            self.rollup_model.niche == normalize_niche(niche),
+            self.rollup_model.day >= since
+        ).order_by(self.rollup_model.day).all()
+
+        topic_count = sum(item.topic_count for item in rollups)
+        score_sum = sum(item.score_sum for item in rollups)
+        source_counts = {}
+        for item in rollups:
+            for source, count in item.source_counts.items():
+                source_counts[source] = source_counts.get(source, 0) + count
+
+        return {
+            'niche': normalize_niche(niche),
+            'since': since.isoformat(),
+            'days': days,
+            'topic_count': topic_count,
+            'mean_score': round(score_sum / topic_count, 2) if topic_count else 0.0,
+            'max_score': max((item.max_score for item in rollups), default=0.0),
+            'source_counts': source_counts,
+            'daily': [item.to_dict() for item in rollups]
+        }
@@ -0,0 +1,277 @@
+from typing import List, Dict, Any, Optional
+
+SENTIMENTS = ('positive', 'negative', 'neutral')
+
+
+class SchemaError(ValueError):
+    """Raised when model output does not match its declared schema"""
+
+
+def _string(data: Dict[str, Any], field: str, required: bool = False, max_length: Optional[int] = None) -> str:
+    """Read a string field, rejecting missing required values and non-strings"""
+    value = data.get(field)
+    if value is None or value == '':
+        if required:
+            raise SchemaError(f"{field} is required")
+        return ''
+    if not isinstance(value, str):
+        raise SchemaError(f"{field} must be a string")
+    value = value.strip()
+    if max_length and len(value) > max_length:
+        # Slightly long text is still usable, so trim instead of retrying
+        value = value[:max_length].rstrip()
+    return value
+
+
+def _score(data: Dict[str, Any], field: str) -> float:
+    """Read a required 0-10 score, clamping values just outside the range"""
+    value = data.get(field)
+    if isinstance(value, bool):
+        raise SchemaError(f"{field} must be a number")
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise SchemaError(f"{field} must be a number")
+    if value != value:
+        raise SchemaError(f"{field} must be a number")
+    return min(max(value, 0.0), 10.0)
+
+
+def _strings(data: Dict[str, Any], field: str) -> List[str]:
+    """Read a list of strings, accepting a comma-separated string as well"""
+    value = data.get(field) or []
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        raise SchemaError(f"{field} must be an array of strings")
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+class AnalyzedTopic:
+    """A topic scored by the model"""
+
+    __slots__ = ('topic_number', 'title', 'description', 'source', 'virality_score',
+                 'relevance_score', 'overall_score', 'reasoning', 'keywords', 'sentiment')
+
+    JSON_SCHEMA = {
+        'type': 'object',
+        'properties': {
+            'topic_number': {'type': 'integer', 'description': 'Number of the topic in the list you were given'},
+            'title': {'type': 'string'},
+            'description': {'type': 'string', 'description': 'Brief description'},
+            'source': {'type': 'string', 'description': 'Where the topic was found'},
+            'virality_score': {'type': 'number', 'minimum': 0, 'maximum': 10},
+            'relevance_score': {'type': 'number', 'minimum': 0, 'maximum': 10},
+            'overall_score': {'type': 'number', 'minimum': 0, 'maximum': 10},
+            'reasoning': {'type': 'string', 'description': 'Brief explanation of the scores'},
+            'keywords': {'type': 'array', 'items': {'type': 'string'}},
+            'sentiment': {'type': 'string', 'enum': list(SENTIMENTS)}
+        },
+        'required': ['topic_number', 'title', 'virality_score', 'relevance_score']
+    }
+
+    def __init__(self, title: str, virality_score: float, relevance_score: float,
+                 topic_number: Optional[int] = None, description: str = '', source: str = '',
+                 reasoning: str = '', keywords: Optional[List[str]] = None, sentiment: str = 'neutral'):
+        self.topic_number = topic_number
+        self.title = title
+        self.description = description
+        self.source = source
+        self.virality_score = virality_score
+        self.relevance_score = relevance_score
+        # Recomputed so every chunk ranks alike, whatever the model wrote
+        self.overall_score = (virality_score + relevance_score) / 2
+        self.reasoning = reasoning
+        self.keywords = keywords or []
+        self.sentiment = sentiment
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'AnalyzedTopic':
+        """Validate a decoded model object, raising SchemaError when it is unusable"""
+        if not isinstance(data, dict):
+            raise SchemaError('topic must be an object')
+
+        topic_number = data.get('topic_number')
+        if not isinstance(topic_number, int) or isinstance(topic_number, bool):
+            topic_number = None
+
+        sentiment = _string(data, 'sentiment').lower() or 'neutral'
+        if sentiment not in SENTIMENTS:
+            sentiment = 'neutral'
+
+        return cls(
+            title=_string(data, 'title'),
+            virality_score=_score(data, 'virality_score'),
+            relevance_score=_score(data, 'relevance_score'),
+            topic_number=topic_number,
+            description=_string(data, 'description'),
+            source=_string(data, 'source'),
+            reasoning=_string(data, 'reasoning'),
+            keywords=_strings(data, 'keywords'),
+            sentiment=sentiment
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the analyzed topic dictionary used by the rest of the app"""
+        return {
+            'title': self.title,
+            'description': self.description,
+            'source': self.source,
+            'virality_score': self.virality_score,
+            'relevance_score': self.relevance_score,
+            'overall_score': self.overall_score,
+            'reasoning': self.reasoning,
+            'keywords': self.keywords,
+            'sentiment': self.sentiment
+        }
+
+
+class CarouselSlide:
+    """One slide of a carousel post"""
+
+    __slots__ = ('slide_number', 'title', 'content', 'call_to_action', 'hashtags')
+
+    JSON_SCHEMA = {
+        'type': 'object',
+        'properties': {
+            'slide_number': {'type': 'integer'},
+            'title': {'type': 'string', 'description': 'Slide title, max 60 characters'},
+            'content': {'type': 'string', 'description': 'Main content text, max 150 characters'},
+            'call_to_action': {'type': 'string', 'description': 'Action item or tip'},
+            'hashtags': {'type': 'array', 'items': {'type': 'string'}, 'description': '3-5 relevant hashtags'}
+        },
+        'required': ['slide_number', 'title', 'content']
+    }
+
+    def __init__(self, slide_number: int, title: str, content: str,
+                 call_to_action: str = '', hashtags: Optional[List[str]] = None):
+        self.slide_number = slide_number
+        self.title = title
+        self.content = content
+        self.call_to_action = call_to_action
+        self.hashtags = hashtags or []
+
+    @classmethod
+    def from_dict(cls, data: Any, position: int) -> 'CarouselSlide':
+        """
+        Validate a decoded slide object
+
+        Args:
+            data: Decoded slide
+            position: 1-based position of the slide, used when it has no number
+
+        Raises:
+            SchemaError: When the slide is missing its title or content
+        """
+        if not isinstance(data, dict):
+            raise SchemaError('slide must be an object')
+
+        slide_number = data.get('slide_number')
+        if not isinstance(slide_number, int) or isinstance(slide_number, bool):
+            slide_number = position
+
+        hashtags = ['#' + tag.lstrip('#') for tag in _strings(data, 'hashtags')]
+        return cls(
+            slide_number=slide_number,
+            title=_string(data, 'title', required=True, max_length=60),
+            content=_string(data, 'content', required=True, max_length=150),
+            call_to_action=_string(data, 'call_to_action'),
+            hashtags=hashtags
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'slide_number': self.slide_number,
+            'title': self.title,
+            'content': self.content,
+            'call_to_action': self.call_to_action,
+            'hashtags': self.hashtags
+        }
+
+
+class CarouselPost:
+    """The post-level fields of a carousel post, validated apart from its slides"""
+
+    __slots__ = ('main_title', 'caption', 'overall_theme')
+
+    JSON_SCHEMA = {
+        'type': 'object',
+        'properties': {
+            'main_title': {'type': 'string', 'description': 'Catchy title for the carousel'},
+            'slides': {'type': 'array', 'items': CarouselSlide.JSON_SCHEMA, 'minItems': 5, 'maxItems': 7},
+            'caption': {'type': 'string', 'description': 'Engaging caption for the post'},
+            'overall_theme': {'type': 'string', 'description': 'Brief description of the carousel theme'}
+        },
+        'required': ['main_title', 'slides', 'caption']
+    }
+
+    def __init__(self, main_title: str, caption: str, overall_theme: str = ''):
+        self.main_title = main_title
+        self.caption = caption
+        self.overall_theme = overall_theme
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'CarouselPost':
+        """Validate the post-level fields, raising SchemaError when they are unusable"""
+        if not isinstance(data, dict):
+            raise SchemaError('post must be an object')
+
+        return cls(
+            main_title=_string(data, 'main_title', required=True),
+            caption=_string(data, 'caption', required=True),
+            overall_theme=_string(data, 'overall_theme')
+        )
+
+    def to_dict(self, slides: List[CarouselSlide]) -> Dict[str, Any]:
+        return {
+            'main_title': self.main_title,
+            'slides': [slide.to_dict() for slide in slides],
+            'caption': self.caption,
+            'overall_theme': self.overall_theme
+        }
+
+
+# Function-calling declarations the model is forced to answer through
+TOPIC_SCORES_FUNCTION = {
+    'name': 'submit_topic_scores',
+    'description': 'Submit the scores for every numbered topic',
+    'parameters': {
+        'type': 'object',
+        'properties': {'topics': {'type': 'array', 'items': AnalyzedTopic.JSON_SCHEMA}},
+        'required': ['topics']
+    }
+}
+
+CAROUSEL_POST_FUNCTION = {
+    'name': 'submit_carousel_post',
+    'description': 'Submit the finished Instagram carousel post',
+    'parameters': CarouselPost.JSON_SCHEMA
+}
+
+CAROUSEL_SLIDES_FUNCTION = {
+    'name': 'submit_carousel_slides',
+    'description': 'Submit replacement slides for a carousel post',
+    'parameters': {
+        'type': 'object',
+        'properties': {'slides': {'type': 'array', 'items': CarouselSlide.JSON_SCHEMA}},
+        'required': ['slides']
+    }
+}
+
+CAROUSEL_BATCH_FUNCTION = {
+    'name': 'submit_carousel_posts',
+    'description': 'Submit one finished Instagram carousel post per numbered topic',
+    'parameters': {
+        'type': 'object',
+        'properties': {
+            'posts': {
+                'type': 'array',
+                'items': dict(CarouselPost.JSON_SCHEMA, properties=dict(
+                    CarouselPost.JSON_SCHEMA['properties'],
+                    topic_number={'type': 'integer', 'description': 'Number of the topic the post is for'}
+                ), required=['topic_number'] + CarouselPost.JSON_SCHEMA['required'])
+            }
+        },
+        'required': ['posts']
+    }
+}
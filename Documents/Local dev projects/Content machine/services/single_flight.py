@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Any, Callable, Hashable, Iterable, Iterator, Optional, Tuple
+
+
+class SharedStream:
+    """
+    A streamed response that several consumers can read at their own pace
+
+    Chunks are pulled from the upstream stream once, as the fastest reader
+    needs them, and buffered so every reader sees the full sequence.
+    """
+
+    def __init__(self, source: Iterable[Any], on_finish: Callable[[], None]):
+        """
+        Args:
+            source: The upstream stream
+            on_finish: Called once when the stream ends, fails or every reader leaves early
+        """
+        self._source = iter(source)
+        self._on_finish = on_finish
+        self._chunks = []
+        self._finished = False
+        self._error = None
+        self._readers = 0
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[Any]:
+        with self._lock:
+            self._readers += 1
+        try:
+            position = 0
+            while True:
+                with self._lock:
+                    if position < len(self._chunks):
+                        chunk = self._chunks[position]
+                    elif self._error is not None:
+                        raise self._error
+                    elif self._finished:
+                        return
+                    else:
+                        chunk = self._pull()
+                        if chunk is None:
+                            return
+                position += 1
+                yield chunk
+        finally:
+            with self._lock:
+                self._readers -= 1
+                abandoned = self._readers == 0 and not self._finished
+            if abandoned:
+                # Every reader left early, so new callers start a fresh call
+                self._on_finish()
+
+    def _pull(self) -> Optional[Any]:
+        """Pull the next upstream chunk (caller holds the lock), None at the end"""
+        try:
+            chunk = next(self._source)
+        except StopIteration:
+            self._finished = True
+            self._on_finish()
+            return None
+        except Exception as e:
+            self._error = e
+            self._finished = True
+            self._on_finish()
+            raise
+        self._chunks.append(chunk)
+        return chunk
+
+
+class _Call:
+    """One in-flight upstream call and the callers waiting on it"""
+
+    __slots__ = ('done', 'result', 'error', 'started_at')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.started_at = time.monotonic()
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one upstream call"""
+
+    def __init__(self, max_age: Optional[float] = None):
+        """
+        Args:
+            max_age: Seconds after which an unfinished call is no longer joined
+        """
+        self.max_age = max_age or float(os.getenv('OPENAI_COALESCE_MAX_AGE', '300'))
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'upstream_calls': 0, 'coalesced': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any], stream: bool = False) -> Any:
+        """
+        Run fn once for every group of concurrent callers with the same key
+
+        Args:
+            key: Identity of the request
+            fn: Makes the upstream call
+            stream: Whether fn returns a stream. Streams stay joinable until
+                they end, and each caller gets its own iterator over them.
+
+        Returns:
+            fn's result, shared by every caller in the group
+        """
+        with self._lock:
+            self._stats['calls'] += 1
+            call = self._calls.get(key)
+            if call is not None and time.monotonic() - call.started_at > self.max_age:
+                call = None
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats['upstream_calls'] += 1
+            else:
+                self._stats['coalesced'] += 1
+
+        if leader:
+            try:
+                result = fn()
+                if stream:
+                    result = SharedStream(result, lambda: self._forget(key, call))
+                call.result = result
+            except Exception as e:
+                call.error = e
+                self._forget(key, call)
+                raise
+            finally:
+                call.done.set()
+            if not stream:
+                self._forget(key, call)
+        else:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+
+        return iter(call.result) if stream else call.result
+
+    def _forget(self, key: Hashable, call: _Call):
+        """Stop new callers from joining a finished call"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_flight'] = len(self._calls)
+        return stats
+
+
+def request_key(kwargs: Dict[str, Any]) -> Tuple[str, str]:
+    """Key a chat completion request by model plus a hash of everything else, messages included"""
+    payload = json.dumps({name: value for name, value in kwargs.items() if name != 'model'},
+                         sort_keys=True, default=str)
+    return kwargs.get('model', ''), hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+_openai_calls = SingleFlight()
+
+
+class _CoalescingCompletions:
+    def __init__(self, completions: Any, group: SingleFlight):
+        self._completions = completions
+        self._group = group
+
+    def create(self, **kwargs) -> Any:
+        return self._group.do(
+            request_key(kwargs),
+            lambda: self._completions.create(**kwargs),
+            stream=bool(kwargs.get('stream'))
+        )
+
+
+class _CoalescingChat:
+    def __init__(self, chat: Any, group: SingleFlight):
+        self.completions = _CoalescingCompletions(chat.completions, group)
+
+
+class CoalescingOpenAI:
+    """
+    OpenAI client wrapper whose chat completions share identical in-flight calls
+
+    Concurrent requests with the same model, messages and parameters wait
+    for one upstream call and get the same response. Streamed responses are
+    replayed to every caller. Everything else passes through to the client.
+    """
+
+    def __init__(self, client: Any, group: Optional[SingleFlight] = None):
+        """
+        Args:
+            client: openai.OpenAI instance
+            group: Single-flight group, defaults to the process-wide one
+        """
+        self._client = client
+        self.chat = _CoalescingChat(client.chat, group or _openai_calls)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+
+def coalesce_openai(client: Any) -> Any:
+    """Wrap an OpenAI client for request coalescing unless OPENAI_COALESCE is off"""
+    if os.getenv('OPENAI_COALESCE', 'true').lower() in ('0', 'false', 'no'):
+        return client
+    return CoalescingOpenAI(client)
+
+
+def get_coalescing_stats() -> Dict[str, int]:
+    """Get counts of chat completion calls, upstream calls and calls that were coalesced"""
+    return _openai_calls.get_stats()
@@ -1,25 +1,26 @@
 import requests
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable
 from datetime import datetime, timedelta
 import json
-import time
 from bs4 import BeautifulSoup
 import praw
 import tweepy
+from services.rate_limiter import get_rate_limiter
+from services.cache import get_topic_cache
+from services.http_session import get_http_session
+from services.dedup import get_detector
 
 class SocialCollector:
     """Service for collecting trending topics from social media platforms"""
     
-    def __init__(self):
+    def __init__(self, topic_cache=None):
+        # Collected topics are cached per (source, niche) in front of each API
+        self.topic_cache = topic_cache or get_topic_cache()
+        
         # Initialize social media APIs with free tier keys
         self.reddit_client = self._init_reddit()
         self.twitter_client = self._init_twitter()
-        
-        # Headers for web scraping
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
     
     def _init_reddit(self):
         """Initialize Reddit API client"""
@@ -32,7 +33,8 @@ class SocialCollector:
                 return praw.Reddit(
                     client_id=client_id,
                     client_secret=client_secret,
-                    user_agent=user_agent
+                    user_agent=user_agent,
+                    requestor_kwargs={'session': get_http_session('reddit')}
                 )
             return None
         except Exception as e:
@@ -47,11 +49,16 @@ class SocialCollector:
             api_secret = os.getenv('TWITTER_API_SECRET')
             
             if bearer_token:
-                return tweepy.Client(bearer_token=bearer_token)
+                client = tweepy.Client(bearer_token=bearer_token)
             elif api_key and api_secret:
                 auth = tweepy.OAuthHandler(api_key, api_secret)
-                return tweepy.API(auth)
-            return None
+                client = tweepy.API(auth)
+            else:
+                return None
+            
+            # Route Twitter calls through the shared connection pools
+            client.session = get_http_session('twitter')
+            return client
         except Exception as e:
             print(f"Error initializing Twitter client: {e}")
             return None
@@ -69,30 +76,34 @@ class SocialCollector:
         topics = []
         
         try:
-            # Collect from Reddit
-            reddit_topics = self._get_reddit_topics(niche)
-            topics.extend(reddit_topics)
+            # Collect from Reddit, Twitter and trending hashtags in turn
+            for fetch_topics in self.get_source_fetchers().values():
+                topics.extend(fetch_topics(niche))
             
-            # Collect from Twitter
-            twitter_topics = self._get_twitter_topics(niche)
-            topics.extend(twitter_topics)
-            
-            # Collect from trending hashtags
-            hashtag_topics = self._get_trending_hashtags(niche)
-            topics.extend(hashtag_topics)
-            
-            # Add fallback topics if no results
-            if not topics:
-                topics = self._get_fallback_social_topics(niche)
-            
-            # Remove duplicates and limit results
-            unique_topics = self._deduplicate_topics(topics)
-            return unique_topics[:10]  # Return top 10 social topics
+            return self.finalize_topics(topics, niche)
             
         except Exception as e:
             print(f"Error collecting social media topics: {e}")
             return self._get_fallback_social_topics(niche)
     
+    def get_source_fetchers(self) -> Dict[str, Callable[[str], List[Dict[str, Any]]]]:
+        """Get the cached per-source fetch functions, keyed by source name"""
+        return {
+            'reddit': self.topic_cache.wrap('reddit', self._get_reddit_topics),
+            'twitter': self.topic_cache.wrap('twitter', self._get_twitter_topics),
+            'twitter_hashtags': self.topic_cache.wrap('twitter_hashtags', self._get_trending_hashtags)
+        }
+    
+    def finalize_topics(self, topics: List[Dict[str, Any]], niche: str) -> List[Dict[str, Any]]:
+        """Apply fallback topics, deduplication and the result limit to collected topics"""
+        # Add fallback topics if no results
+        if not topics:
+            topics = self._get_fallback_social_topics(niche)
+        
+        # Remove duplicates and limit results
+        unique_topics = self._deduplicate_topics(topics)
+        return unique_topics[:10]  # Return top 10 social topics
+    
     def _get_reddit_topics(self, niche: str) -> List[Dict[str, Any]]:
         """Get trending topics from Reddit"""
         topics = []
@@ -109,6 +120,7 @@ class SocialCollector:
             
             for subreddit_name in relevant_subreddits[:3]:  # Limit to top 3 subreddits
                 try:
+                    get_rate_limiter('reddit').acquire()
                     subreddit = self.reddit_client.subreddit(subreddit_name)
                     
                     # Get hot posts
@@ -125,13 +137,12 @@ class SocialCollector:
                             }
                             topics.append(topic)
                     
-                    time.sleep(1)  # Rate limiting
-                    
                 except Exception as e:
                     print(f"Error accessing subreddit {subreddit_name}: {e}")
                     continue
             
             # Also search across all subreddits
+            get_rate_limiter('reddit').acquire()
             search_results = self.reddit_client.subreddit('all').search(search_query, sort='hot', limit=5)
             for post in search_results:
                 if post.score > 20:  # Higher threshold for general search
@@ -162,6 +173,8 @@ class SocialCollector:
             # Search for niche-related tweets
             search_query = niche
             
+            get_rate_limiter('twitter').acquire()
+            
             if hasattr(self.twitter_client, 'search_recent_tweets'):
                 # Twitter API v2
                 tweets = self.twitter_client.search_recent_tweets(
@@ -216,6 +229,7 @@ class SocialCollector:
             if self.twitter_client and hasattr(self.twitter_client, 'get_place_trends'):
                 try:
                     # Get worldwide trends
+                    get_rate_limiter('twitter').acquire()
                     trends = self.twitter_client.get_place_trends(1)  # 1 = worldwide
                     
                     for trend in trends[0]['trends'][:10]:
@@ -323,38 +337,8 @@ class SocialCollector:
         return base_hashtags
     
     def _deduplicate_topics(self, topics: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Remove duplicate topics based on title similarity"""
-        unique_topics = []
-        seen_titles = set()
-        
-        for topic in topics:
-            title = topic.get('title', '').lower()
-            
-            # Check if similar title already exists
-            is_duplicate = False
-            for seen_title in seen_titles:
-                if self._similarity_score(title, seen_title) > 0.7:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                unique_topics.append(topic)
-                seen_titles.add(title)
-        
-        return unique_topics
-    
-    def _similarity_score(self, title1: str, title2: str) -> float:
-        """Calculate similarity between two titles"""
-        words1 = set(title1.split())
-        words2 = set(title2.split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union)
+        """Remove duplicate topics based on title similarity (Jaccard above 0.7)"""
+        return get_detector(0.7).deduplicate(topics)
     
     def _get_fallback_social_topics(self, niche: str) -> List[Dict[str, Any]]:
         """Get fallback social media topics when APIs fail"""
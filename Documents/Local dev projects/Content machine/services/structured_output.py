@@ -0,0 +1,91 @@
+import os
+import threading
+from typing import Dict, Any, Iterable, Iterator
+
+
+def structured_output_enabled() -> bool:
+    """Whether OpenAI calls should answer through declared function schemas"""
+    return os.getenv('STRUCTURED_OUTPUT', 'true').lower() not in ('0', 'false', 'no')
+
+
+def structured_output_retries() -> int:
+    """How many follow-up calls may re-request just the invalid items"""
+    return int(os.getenv('STRUCTURED_OUTPUT_RETRIES', '1'))
+
+
+def function_call_kwargs(function: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build chat completion arguments that force an answer through one function
+
+    Args:
+        function: Function declaration with name, description and JSON schema parameters
+
+    Returns:
+        Keyword arguments for chat.completions.create
+    """
+    return {
+        'tools': [{'type': 'function', 'function': function}],
+        'tool_choice': {'type': 'function', 'function': {'name': function['name']}}
+    }
+
+
+def iter_function_arguments(response: Iterable[Any]) -> Iterator[str]:
+    """
+    Yield the JSON argument text of a streamed function call
+
+    Text content is yielded as well, so a model that answers in prose
+    instead of calling the function still reaches the JSON extractor.
+    """
+    for chunk in response:
+        choices = getattr(chunk, 'choices', None)
+        if not choices:
+            continue
+        delta = choices[0].delta
+        for tool_call in getattr(delta, 'tool_calls', None) or []:
+            arguments = getattr(tool_call.function, 'arguments', None) if tool_call.function else None
+            if arguments:
+                yield arguments
+        text = getattr(delta, 'content', None)
+        if text:
+            yield text
+
+
+def function_arguments(response: Any) -> str:
+    """Get the function call arguments of a complete response, or its text content"""
+    message = response.choices[0].message
+    tool_calls = getattr(message, 'tool_calls', None)
+    if tool_calls:
+        return tool_calls[0].function.arguments or ''
+    return message.content or ''
+
+
+class ValidationStats:
+    """Thread-safe counters of validated, invalid and retried model items"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, kind: str, valid: int = 0, invalid: int = 0, retried: int = 0):
+        """
+        Record the outcome of validating one model response
+
+        Args:
+            kind: Item kind, e.g. 'topics' or 'slides'
+            valid: Items that passed validation
+            invalid: Items missing or failing validation
+            retried: Invalid items sent back to the model in a follow-up call
+        """
+        with self._lock:
+            counts = self._counts.setdefault(kind, {'responses': 0, 'valid': 0, 'invalid': 0, 'retried': 0})
+            counts['responses'] += 1
+            counts['valid'] += valid
+            counts['invalid'] += invalid
+            counts['retried'] += retried
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {kind: dict(counts) for kind, counts in self._counts.items()}
+
+
+validation_stats = ValidationStats()
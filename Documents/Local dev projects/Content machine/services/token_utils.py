@@ -0,0 +1,41 @@
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Rough characters per token for English text when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+_encodings = {}
+
+
+def estimate_tokens(text: str, model: Optional[str] = 'gpt-4') -> int:
+    """
+    Estimate how many tokens a piece of text uses in a prompt
+
+    Uses tiktoken when it is installed and a characters-per-token
+    approximation otherwise.
+
+    Args:
+        text: Prompt text
+        model: Model whose tokenizer to use
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+
+    if tiktoken is not None:
+        encoding = _encodings.get(model)
+        if encoding is None:
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding('cl100k_base')
+            _encodings[model] = encoding
+        return len(encoding.encode(text))
+
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
@@ -0,0 +1,129 @@
+import os
+from typing import List, Dict, Any, Tuple
+from services.dedup import NearDuplicateDetector
+from services.fingerprints import canonicalize_url
+from services.token_utils import estimate_tokens
+from services.virality import parse_published_at
+
+
+class TopicMerger:
+    """Service for merging the same story reported by several sources into one topic"""
+
+    def __init__(self, title_threshold: float = None):
+        """
+        Args:
+            title_threshold: Titles with Jaccard similarity above this are the same story
+        """
+        self.title_threshold = title_threshold or float(os.getenv('TOPIC_MERGE_THRESHOLD', '0.6'))
+        self.detector = NearDuplicateDetector(self.title_threshold)
+
+    def merge(self, topics: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+        """
+        Cluster near-duplicate topics across sources and merge each cluster
+
+        Topics are the same story when their canonical URLs match or their
+        titles are similar. Each cluster becomes one representative topic
+        carrying the combined engagement and every source it came from.
+
+        Args:
+            topics: Topics from every collector
+
+        Returns:
+            Tuple of (merged topics in first-seen order, merge report)
+        """
+        if not topics:
+            return [], self._build_report(topics, [])
+
+        parents = list(range(len(topics)))
+
+        def find(index):
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
+
+        def union(first, second):
+            first, second = find(first), find(second)
+            if first != second:
+                parents[max(first, second)] = min(first, second)
+
+        # Same canonical URL means the same story
+        url_owners = {}
+        for index, topic in enumerate(topics):
+            url = canonicalize_url(topic.get('url', ''))
+            if url:
+                if url in url_owners:
+                    union(index, url_owners[url])
+                else:
+                    url_owners[url] = index
+
+        # Similar titles mean the same story, whichever source reported it
+        for index, representative in self.detector.assign_clusters(topics):
+            union(index, representative)
+
+        clusters = {}
+        for index in range(len(topics)):
+            clusters.setdefault(find(index), []).append(topics[index])
+
+        merged_topics = [self._merge_cluster(members) for _, members in sorted(clusters.items())]
+        return merged_topics, self._build_report(topics, merged_topics)
+
+    def _merge_cluster(self, members: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine a cluster into its most relevant, most descriptive member"""
+        if len(members) == 1:
+            return members[0]
+
+        representative = max(
+            members,
+            key=lambda topic: (topic.get('relevance_score', 0), len(topic.get('description', '') or ''))
+        )
+        merged = dict(representative)
+
+        sources = []
+        urls = []
+        for topic in members:
+            for source in topic.get('sources', [topic.get('source')]):
+                if source and source not in sources:
+                    sources.append(source)
+            url = topic.get('url')
+            if url and url not in urls:
+                urls.append(url)
+
+        engagement = [topic['engagement_score'] for topic in members if topic.get('engagement_score')]
+        if engagement:
+            merged['engagement_score'] = sum(engagement)
+
+        # Sources write dates in different formats, so compare them parsed
+        published = [(parse_published_at(topic.get('published_at')), topic.get('published_at'))
+                     for topic in members]
+        published = [item for item in published if item[0] is not None]
+        if published:
+            merged['published_at'] = max(published, key=lambda item: item[0])[1]
+
+        merged['relevance_score'] = max(topic.get('relevance_score', 0) for topic in members)
+        merged['sources'] = sources
+        merged['urls'] = urls
+        merged['merged_count'] = sum(topic.get('merged_count', 1) for topic in members)
+        return merged
+
+    def _build_report(self, topics: List[Dict[str, Any]],
+                      merged_topics: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Report how many topics were merged and the prompt tokens that saves"""
+        tokens_before = sum(self._prompt_tokens(topic) for topic in topics)
+        tokens_after = sum(self._prompt_tokens(topic) for topic in merged_topics)
+        return {
+            'input_topics': len(topics),
+            'merged_topics': len(merged_topics),
+            'duplicates_removed': len(topics) - len(merged_topics),
+            'prompt_tokens_before': tokens_before,
+            'prompt_tokens_after': tokens_after,
+            'prompt_tokens_saved': tokens_before - tokens_after
+        }
+
+    def _prompt_tokens(self, topic: Dict[str, Any]) -> int:
+        """Estimate the tokens a topic adds to the analysis prompt"""
+        return estimate_tokens(
+            f"Title: {topic.get('title', '')}\n"
+            f"Description: {topic.get('description', '')}\n"
+            f"Source: {topic.get('source', '')}\n"
+        )
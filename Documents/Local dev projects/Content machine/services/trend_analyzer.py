@@ -1,108 +1,404 @@
 import openai
 import os
-import json
-from typing import List, Dict, Any
-import re
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+from services.cache import TTLCache
+from services.fingerprints import hash_topic_batch, normalize_text, topic_fingerprint
+from services.token_utils import estimate_tokens
+from services.local_scorer import LocalScorer
+from services.virality import get_virality_scorer
+from services.model_router import LOCAL_ROUTE, get_model_router
+from services.single_flight import coalesce_openai, get_coalescing_stats
+from services.json_stream import JSONStreamExtractor, iter_completion_text
+from services.schemas import AnalyzedTopic, SchemaError, TOPIC_SCORES_FUNCTION
+from services.structured_output import (
+    structured_output_enabled, structured_output_retries, function_call_kwargs,
+    iter_function_arguments, validation_stats
+)
+
+# Bump whenever the analysis prompt changes so cached results are not reused
+PROMPT_VERSION = '3'
+
+# Completion budget per analysis request and the share one scored topic needs
+ANALYSIS_MAX_TOKENS = 2000
+OUTPUT_TOKENS_PER_TOPIC = 150
+
+# Fields the model produces for a topic, remembered per topic fingerprint
+SCORE_FIELDS = ('virality_score', 'relevance_score', 'overall_score', 'reasoning', 'keywords', 'sentiment')
+
+# Analysis results shared by every analyzer in the process, keyed by batch hash
+_analysis_cache = TTLCache(
+    max_size=int(os.getenv('ANALYSIS_CACHE_SIZE', '256')),
+    default_ttl=float(os.getenv('ANALYSIS_CACHE_TTL', '900'))
+)
+
+# Per-topic scores keyed by (niche, scoring model, topic fingerprint) so only new topics are scored
+_topic_scores = TTLCache(
+    max_size=int(os.getenv('TOPIC_SCORE_CACHE_SIZE', '5000')),
+    default_ttl=float(os.getenv('TOPIC_SCORE_CACHE_TTL', '7200'))
+)
 
 class TrendAnalyzer:
     """Service for analyzing and ranking trending topics using AI"""
     
-    def __init__(self):
-        self.openai_client = openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    def __init__(self, router=None):
+        self.openai_client = coalesce_openai(openai.OpenAI(api_key=os.getenv('OPENAI_API_KEY')))
+        self.local_scorer = LocalScorer()
+        self.virality_scorer = get_virality_scorer()
+        self.router = router or get_model_router()
     
-    def analyze_topics(self, topics: List[Dict[str, Any]], niche: str) -> List[Dict[str, Any]]:
+    def analyze_topics(self, topics: List[Dict[str, Any]], niche: str, client: Any = None) -> List[Dict[str, Any]]:
         """
         Analyze trending topics and rank them by virality and relevance
         
         Args:
             topics: List of trending topics from various sources
             niche: The client's niche for relevance scoring
+            client: Client whose model routes pick the scoring model
             
         Returns:
             List of analyzed and ranked topics
         """
+        return self.analyze_topics_with_status(topics, niche, client)[0]
+    
+    def analyze_topics_with_status(self, topics: List[Dict[str, Any]], niche: str,
+                                   client: Any = None) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Analyze and rank topics like analyze_topics, also reporting model failures
+        
+        Returns:
+            Tuple of (analyzed and ranked topics, whether any topic got fallback
+            scores because the model failed to score it)
+        """
         if not topics:
-            return []
+            return [], False
         
-        # Prepare topics for AI analysis
-        topics_text = self._prepare_topics_for_analysis(topics, niche)
+        model = self.router.model_for('topic_scoring', client)
         
-        try:
-            # Use OpenAI to analyze topics
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert trend analyst specializing in social media and content marketing. 
-                        Your task is to analyze trending topics and score them based on:
-                        1. Virality Score (0-10): How likely is this topic to go viral? Consider engagement potential, shareability, and current momentum.
-                        2. Relevance Score (0-10): How relevant is this topic to the specified niche and target audience?
-                        3. Overall Score: Average of virality and relevance scores.
-                        
-                        Return your analysis as a JSON array with each topic having:
-                        - title: The topic title
-                        - description: Brief description
-                        - source: Where the topic was found
-                        - virality_score: 0-10 score
-                        - relevance_score: 0-10 score
-                        - overall_score: Average of the two scores
-                        - reasoning: Brief explanation of your scoring
-                        - keywords: Array of relevant keywords
-                        - sentiment: positive, negative, or neutral"""
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Analyze these trending topics for the niche: {niche}\n\n{topics_text}"
-                    }
-                ],
-                temperature=0.3,
-                max_tokens=2000
+        # Identical batches within the TTL reuse the previous analysis
+        cache_key = hash_topic_batch(topics, niche, f'{PROMPT_VERSION}:{model}')
+        cached_topics = _analysis_cache.get(cache_key)
+        if cached_topics is not None:
+            return copy.deepcopy(cached_topics), False
+        
+        # Only topics without a remembered score go to the model
+        analyzed_topics, unseen_topics = self._split_scored_topics(topics, niche, model)
+        
+        used_fallback = False
+        if unseen_topics:
+            # Only the locally most relevant and viral topics are worth model tokens
+            top_k = int(os.getenv('ANALYSIS_TOP_K', '30'))
+            virality_scores = self.virality_scorer.score(unseen_topics)
+            candidates, pruned_topics, _ = self.local_scorer.select_top_k(
+                unseen_topics, niche, top_k, boost=virality_scores
             )
             
-            # Parse AI response
-            content = response.choices[0].message.content
-            analyzed_topics = self._parse_ai_response(content)
+            if model == LOCAL_ROUTE:
+                # Routed away from the model, the local scores are the final ones
+                analyzed_topics.extend(self._fallback_analysis(candidates, niche, reasoning='Scored locally'))
+            else:
+                new_topics, used_fallback = self._score_topics(candidates, niche, model)
+                analyzed_topics.extend(new_topics)
+            analyzed_topics.extend(self._fallback_analysis(
+                pruned_topics, niche, reasoning='Pruned by local pre-scoring'
+            ))
+        
+        # Rank every chunk's results together (highest first)
+        analyzed_topics.sort(key=self._ranking_key, reverse=True)
+        
+        # Don't pin fallback scores for topics the model could not score
+        if analyzed_topics and not used_fallback:
+            _analysis_cache.set(cache_key, copy.deepcopy(analyzed_topics))
+        
+        return analyzed_topics, used_fallback
+    
+    def _score_topics(self, topics: List[Dict[str, Any]], niche: str,
+                      model: str) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Score topics with the model in parallel, token-budgeted chunks
+        
+        Topics the model does not return a score for get fallback scores,
+        so no topic is dropped.
+        
+        Returns:
+            Tuple of (analyzed topics, whether any topic needed fallback scoring)
+        """
+        chunks = self._chunk_topics(topics)
+        
+        if len(chunks) == 1:
+            chunk_results = [self._score_chunk(chunks[0], niche, model)]
+        else:
+            max_workers = min(len(chunks), int(os.getenv('ANALYSIS_MAX_PARALLEL_CHUNKS', '4')))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                chunk_results = list(executor.map(lambda chunk: self._score_chunk(chunk, niche, model), chunks))
+        
+        analyzed_topics = []
+        unscored_topics = []
+        for chunk, results in zip(chunks, chunk_results):
+            for topic, analyzed_topic in zip(chunk, results):
+                if analyzed_topic is None:
+                    unscored_topics.append(topic)
+                else:
+                    self._remember_score(topic, analyzed_topic, niche, model)
+                    analyzed_topics.append(analyzed_topic)
+        
+        if unscored_topics:
+            # Fallback to basic scoring for the topics the model missed
+            analyzed_topics.extend(self._fallback_analysis(unscored_topics, niche))
+        
+        return analyzed_topics, bool(unscored_topics)
+    
+    def _chunk_topics(self, topics: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split topics into chunks whose prompt and expected output fit the token budget"""
+        max_prompt_tokens = int(os.getenv('ANALYSIS_CHUNK_TOKENS', '1500'))
+        max_topics = int(os.getenv('ANALYSIS_CHUNK_MAX_TOPICS', str(ANALYSIS_MAX_TOKENS // OUTPUT_TOKENS_PER_TOPIC)))
+        
+        chunks = []
+        current_chunk = []
+        current_tokens = 0
+        for topic in topics:
+            topic_tokens = estimate_tokens(self._format_topic(len(current_chunk) + 1, topic))
+            if current_chunk and (current_tokens + topic_tokens > max_prompt_tokens or len(current_chunk) >= max_topics):
+                chunks.append(current_chunk)
+                current_chunk = []
+                current_tokens = 0
+            current_chunk.append(topic)
+            current_tokens += topic_tokens
+        
+        if current_chunk:
+            chunks.append(current_chunk)
+        return chunks
+    
+    def _score_chunk(self, chunk: List[Dict[str, Any]], niche: str, model: str) -> List[Optional[Dict[str, Any]]]:
+        """
+        Score one chunk, returning a result per input topic (None where the model gave none)
+        
+        Topics whose result is missing or fails validation are sent back to
+        the model on their own, instead of re-scoring the whole chunk.
+        """
+        results = [None] * len(chunk)
+        pending = list(range(len(chunk)))
+        retries = structured_output_retries()
+        
+        for attempt in range(retries + 1):
+            topics = [chunk[index] for index in pending]
+            try:
+                analyzed_topics = self._score_with_ai(topics, niche, model)
+            except Exception as e:
+                print(f"Error analyzing topics with AI: {e}")
+                break
             
-            # Sort by overall score (highest first)
-            analyzed_topics.sort(key=lambda x: x.get('overall_score', 0), reverse=True)
+            invalid = []
+            for index, analyzed_topic in zip(pending, self._align_results(analyzed_topics, topics)):
+                validated = self._validate_topic(analyzed_topic)
+                if validated is None:
+                    invalid.append(index)
+                    continue
+                for field in ('title', 'description', 'source'):
+                    # The schema only requires scores, keep what we already know
+                    validated[field] = validated[field] or chunk[index].get(field, '')
+                results[index] = validated
             
+            retrying = bool(invalid) and attempt < retries
+            validation_stats.record('topics', valid=len(pending) - len(invalid), invalid=len(invalid),
+                                    retried=len(invalid) if retrying else 0)
+            if not retrying:
+                break
+            print(f"Retrying {len(invalid)} of {len(chunk)} topics with missing or invalid scores")
+            pending = invalid
+        
+        return results
+    
+    def _validate_topic(self, analyzed_topic: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Validate one model result against the topic schema, returning None when unusable"""
+        if analyzed_topic is None:
+            return None
+        try:
+            return AnalyzedTopic.from_dict(analyzed_topic).to_dict()
+        except SchemaError as e:
+            print(f"Invalid topic score from AI: {e}")
+            return None
+    
+    def _align_results(self, analyzed_topics: List[Dict[str, Any]],
+                       source_topics: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Match model results back to the topics they score"""
+        aligned = [None] * len(source_topics)
+        titles = {normalize_text(topic.get('title', '')): index for index, topic in enumerate(source_topics)}
+        numbered = any(isinstance(topic.get('topic_number'), int) for topic in analyzed_topics)
+        
+        for position, analyzed_topic in enumerate(analyzed_topics):
+            if not isinstance(analyzed_topic, dict):
+                continue
+            
+            # Match by the number we gave the model, then by title, then by position
+            index = None
+            topic_number = analyzed_topic.pop('topic_number', None)
+            if isinstance(topic_number, int) and 1 <= topic_number <= len(source_topics):
+                index = topic_number - 1
+            if index is None or aligned[index] is not None:
+                index = titles.get(normalize_text(analyzed_topic.get('title', '')))
+            if index is None and not numbered and len(analyzed_topics) == len(source_topics):
+                index = position
+            if index is None or aligned[index] is not None:
+                continue
+            
+            aligned[index] = analyzed_topic
+        
+        return aligned
+    
+    def _ranking_key(self, topic: Dict[str, Any]):
+        """Sort key for the global ranking, breaking score ties deterministically"""
+        return (topic.get('overall_score', 0), topic.get('virality_score', 0), topic.get('title', ''))
+    
+    def _score_with_ai(self, topics: List[Dict[str, Any]], niche: str, model: str) -> List[Dict[str, Any]]:
+        """Score topics with OpenAI, raising if the request fails"""
+        extractor = JSONStreamExtractor(list)
+        analyzed_topics = []
+        text = []
+        for chunk in self.stream_analysis_text(topics, niche, model):
+            text.append(chunk)
+            analyzed_topics.extend(extractor.feed(chunk))
+        analyzed_topics.extend(extractor.finish())
+        
+        if extractor.result is not None:
+            return extractor.result
+        if analyzed_topics:
+            # Output was cut off, keep the topics that completed
             return analyzed_topics
+        return self._fallback_parsing(''.join(text))
+    
+    def iter_analyzed_topics(self, topics: List[Dict[str, Any]], niche: str,
+                             model: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream model scores, yielding each analyzed topic as soon as its JSON object completes
+        
+        Args:
+            topics: Topics to score in one request
+            niche: The client's niche
+            model: Model to score with, defaults to the topic_scoring route
             
-        except Exception as e:
-            print(f"Error analyzing topics with AI: {e}")
-            # Fallback to basic scoring
-            return self._fallback_analysis(topics, niche)
+        Yields:
+            Analyzed topic dictionaries in the order the model writes them
+        """
+        extractor = JSONStreamExtractor(list)
+        for chunk in self.stream_analysis_text(topics, niche, model):
+            yield from extractor.feed(chunk)
+        yield from extractor.finish()
+    
+    def stream_analysis_text(self, topics: List[Dict[str, Any]], niche: str,
+                             model: Optional[str] = None) -> Iterator[str]:
+        """Request a streamed analysis from OpenAI and yield its text deltas"""
+        model = model or self.router.model_for('topic_scoring')
+        if model == LOCAL_ROUTE:
+            raise ValueError('Topic scoring is routed to the local scorer')
+        
+        # Prepare topics for AI analysis
+        topics_text = self._prepare_topics_for_analysis(topics, niche)
+        
+        # Answer through the declared schema when structured output is on
+        structured = structured_output_enabled()
+        schema_kwargs = function_call_kwargs(TOPIC_SCORES_FUNCTION) if structured else {}
+        
+        # Use OpenAI to analyze topics
+        messages = [
+            {
+                "role": "system",
+                "content": """You are an expert trend analyst specializing in social media and content marketing. 
+                Your task is to analyze trending topics and score them based on:
+                1. Virality Score (0-10): How likely is this topic to go viral? Consider engagement potential, shareability, and current momentum.
+                2. Relevance Score (0-10): How relevant is this topic to the specified niche and target audience?
+                3. Overall Score: Average of virality and relevance scores.
+                
+                Return your analysis as a JSON array with each topic having:
+                - topic_number: The number of the topic in the list you were given
+                - title: The topic title
+                - description: Brief description
+                - source: Where the topic was found
+                - virality_score: 0-10 score
+                - relevance_score: 0-10 score
+                - overall_score: Average of the two scores
+                - reasoning: Brief explanation of your scoring
+                - keywords: Array of relevant keywords
+                - sentiment: positive, negative, or neutral"""
+            },
+            {
+                "role": "user",
+                "content": topics_text
+            }
+        ]
+        
+        started = time.perf_counter()
+        response = self.openai_client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=0.3,
+            max_tokens=ANALYSIS_MAX_TOKENS,
+            stream=True,
+            **schema_kwargs
+        )
+        
+        chunks = iter_function_arguments(response) if structured else iter_completion_text(response)
+        return self.router.track_stream('topic_scoring', model, messages, chunks, started)
+    
+    def _split_scored_topics(self, topics: List[Dict[str, Any]], niche: str, model: str):
+        """
+        Split topics into those with a remembered score from this model and those still unseen
+        
+        Returns:
+            Tuple of (analyzed topics rebuilt from stored scores, unseen topics)
+        """
+        niche_key = normalize_text(niche)
+        analyzed_topics = []
+        unseen_topics = []
+        seen_fingerprints = set()
+        
+        for topic in topics:
+            fingerprint = topic_fingerprint(topic)
+            if fingerprint in seen_fingerprints:
+                continue
+            seen_fingerprints.add(fingerprint)
+            
+            scores = _topic_scores.get((niche_key, model, fingerprint))
+            if scores is None:
+                unseen_topics.append(topic)
+                continue
+            
+            analyzed_topic = {
+                'title': topic.get('title', ''),
+                'description': topic.get('description', ''),
+                'source': topic.get('source', '')
+            }
+            analyzed_topic.update(copy.deepcopy(scores))
+            analyzed_topics.append(analyzed_topic)
+        
+        return analyzed_topics, unseen_topics
+    
+    def _remember_score(self, source_topic: Dict[str, Any], analyzed_topic: Dict[str, Any], niche: str,
+                        model: str):
+        """Store a model's score per topic fingerprint so later runs on that model can skip the topic"""
+        scores = {field: analyzed_topic[field] for field in SCORE_FIELDS if field in analyzed_topic}
+        _topic_scores.set((normalize_text(niche), model, topic_fingerprint(source_topic)), copy.deepcopy(scores))
     
     def _prepare_topics_for_analysis(self, topics: List[Dict[str, Any]], niche: str) -> str:
         """Prepare topics text for AI analysis"""
         topics_text = f"Analyze these trending topics for the niche: {niche}\n\n"
         
         for i, topic in enumerate(topics, 1):
-            title = topic.get('title', 'No title')
-            description = topic.get('description', 'No description')
-            source = topic.get('source', 'Unknown source')
-            
-            topics_text += f"{i}. Title: {title}\n"
-            topics_text += f"   Description: {description}\n"
-            topics_text += f"   Source: {source}\n\n"
+            topics_text += self._format_topic(i, topic)
         
         return topics_text
     
-    def _parse_ai_response(self, content: str) -> List[Dict[str, Any]]:
-        """Parse AI response to extract analyzed topics"""
-        try:
-            # Try to extract JSON from the response
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                return json.loads(json_str)
-            else:
-                # Fallback parsing
-                return self._fallback_parsing(content)
-        except json.JSONDecodeError:
-            print("Failed to parse AI response as JSON, using fallback parsing")
-            return self._fallback_parsing(content)
+    def _format_topic(self, number: int, topic: Dict[str, Any]) -> str:
+        """Format a single numbered topic for the analysis prompt"""
+        title = topic.get('title', 'No title')
+        description = topic.get('description', 'No description')
+        source = topic.get('source', 'Unknown source')
+        
+        return (f"{number}. Title: {title}\n"
+                f"   Description: {description}\n"
+                f"   Source: {source}\n\n")
     
     def _fallback_parsing(self, content: str) -> List[Dict[str, Any]]:
         """Fallback parsing when JSON parsing fails"""
@@ -141,33 +437,18 @@ class TrendAnalyzer:
         
         return topics
     
-    def _fallback_analysis(self, topics: List[Dict[str, Any]], niche: str) -> List[Dict[str, Any]]:
-        """Fallback analysis when AI analysis fails"""
+    def _fallback_analysis(self, topics: List[Dict[str, Any]], niche: str,
+                           reasoning: str = 'Fallback analysis used') -> List[Dict[str, Any]]:
+        """Fallback analysis when AI analysis fails or a topic is pruned before it"""
         analyzed_topics = []
+        niche_keywords = niche.lower().split()
         
-        for topic in topics:
-            # Basic scoring based on title length and keywords
-            title = topic.get('title', '').lower()
-            description = topic.get('description', '').lower()
-            niche_keywords = niche.lower().split()
-            
-            # Simple relevance scoring
-            relevance_score = 0
-            for keyword in niche_keywords:
-                if keyword in title or keyword in description:
-                    relevance_score += 2
-            
-            relevance_score = min(relevance_score, 10)
-            
-            # Simple virality scoring (based on title length and source)
-            virality_score = 5.0  # Default score
-            if len(title) > 50:  # Longer titles might be more engaging
-                virality_score += 1
-            if topic.get('source') in ['twitter', 'reddit']:  # Social sources
-                virality_score += 2
-            
-            virality_score = min(virality_score, 10)
-            
+        # TF-IDF relevance and engagement velocity for the whole batch in vectorized passes
+        relevance_scores = self.local_scorer.score_relevance(topics, niche)
+        virality_scores = self.virality_scorer.score(topics)
+        
+        for topic, relevance_score, virality_score in zip(topics, relevance_scores.tolist(),
+                                                          virality_scores.tolist()):
             analyzed_topic = {
                 'title': topic.get('title', ''),
                 'description': topic.get('description', ''),
@@ -175,7 +456,7 @@ class TrendAnalyzer:
                 'virality_score': virality_score,
                 'relevance_score': relevance_score,
                 'overall_score': (virality_score + relevance_score) / 2,
-                'reasoning': 'Fallback analysis used',
+                'reasoning': reasoning,
                 'keywords': niche_keywords,
                 'sentiment': 'neutral'
             }
@@ -185,3 +466,13 @@ class TrendAnalyzer:
         # Sort by overall score
         analyzed_topics.sort(key=lambda x: x['overall_score'], reverse=True)
         return analyzed_topics
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get hit and miss counters for the batch and per-topic score caches"""
+        return {
+            'batches': _analysis_cache.get_stats(),
+            'topic_scores': _topic_scores.get_stats(),
+            'virality': self.virality_scorer.cache.get_stats(),
+            'validation': validation_stats.get_stats(),
+            'coalescing': get_coalescing_stats()
+        }
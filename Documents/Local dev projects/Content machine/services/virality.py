@@ -0,0 +1,151 @@
+import os
+import math
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Any, Optional
+import numpy as np
+from services.cache import TTLCache
+from services.fingerprints import topic_fingerprint
+
+# Engagement velocity (engagement per hour^GRAVITY) treated as "fully viral" per source
+SOURCE_REFERENCE_VELOCITY = {
+    'reddit': 100.0,
+    'reddit_search': 100.0,
+    'twitter': 100.0,
+    'twitter_trends': 20000.0
+}
+DEFAULT_REFERENCE_VELOCITY = 100.0
+
+# Sources without real engagement numbers get a fixed engagement prior instead
+SOURCE_ENGAGEMENT_PRIORS = {
+    'gnews': 0.5,
+    'newsapi': 0.5,
+    'generated': 0.3,
+    'fallback': 0.3,
+    'fallback_social': 0.3
+}
+
+# Velocity decays like Hacker News ranking: engagement / (age_hours + 2) ^ GRAVITY
+GRAVITY = 1.5
+
+# Hours after which the recency component halves
+RECENCY_HALF_LIFE_HOURS = 24.0
+
+# Assumed age when a topic has no usable publish time
+UNKNOWN_AGE_HOURS = 24.0
+
+ENGAGEMENT_WEIGHT = 0.6
+RECENCY_WEIGHT = 0.4
+
+
+def parse_published_at(value: Any) -> Optional[datetime]:
+    """Parse ISO 8601 or RFC 2822 (GNews) publish times into aware UTC datetimes"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        published = value
+    else:
+        text = str(value).strip()
+        try:
+            published = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                published = parsedate_to_datetime(text)
+            except (TypeError, ValueError):
+                return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return published
+
+
+class ViralityScorer:
+    """Deterministic virality scores from time-decayed engagement velocity"""
+
+    def __init__(self, cache_ttl: Optional[float] = None):
+        """
+        Args:
+            cache_ttl: Seconds a topic's score is reused, keyed by topic fingerprint
+        """
+        self.cache = TTLCache(
+            max_size=int(os.getenv('VIRALITY_CACHE_SIZE', '5000')),
+            default_ttl=cache_ttl or float(os.getenv('VIRALITY_CACHE_TTL', '900'))
+        )
+
+    def score(self, topics: List[Dict[str, Any]], now: Optional[datetime] = None) -> np.ndarray:
+        """
+        Score the virality of a batch of topics from 0 to 10
+
+        Scores mix how fast a topic gathers engagement, compared with a
+        reference velocity for its source, and how recently it was
+        published. Every score depends only on its own topic, so scores are
+        cached per topic fingerprint and reused across batches.
+
+        Args:
+            topics: Topics with source, engagement_score and published_at
+            now: Reference time, defaults to the current UTC time
+
+        Returns:
+            Array of virality scores, one per topic
+        """
+        scores = np.zeros(len(topics))
+        fingerprints = [topic_fingerprint(topic) for topic in topics]
+
+        missing = []
+        for index, fingerprint in enumerate(fingerprints):
+            cached = self.cache.get(fingerprint)
+            if cached is None:
+                missing.append(index)
+            else:
+                scores[index] = cached
+
+        if missing:
+            computed = self._compute([topics[index] for index in missing], now)
+            scores[missing] = computed
+            for index, value in zip(missing, computed.tolist()):
+                self.cache.set(fingerprints[index], value)
+
+        return scores
+
+    def _compute(self, topics: List[Dict[str, Any]], now: Optional[datetime]) -> np.ndarray:
+        """Compute scores for topics with array math"""
+        now = now or datetime.now(timezone.utc)
+
+        ages = []
+        engagement = []
+        reference = []
+        priors = []
+        for topic in topics:
+            published = parse_published_at(topic.get('published_at'))
+            ages.append((now - published).total_seconds() / 3600 if published else UNKNOWN_AGE_HOURS)
+
+            source = topic.get('source', '')
+            engagement.append(float(topic.get('engagement_score') or 0))
+            reference.append(SOURCE_REFERENCE_VELOCITY.get(source, DEFAULT_REFERENCE_VELOCITY))
+            priors.append(SOURCE_ENGAGEMENT_PRIORS.get(source, math.nan))
+
+        ages = np.clip(np.asarray(ages), 0.0, None)
+        engagement = np.clip(np.asarray(engagement), 0.0, None)
+        reference = np.asarray(reference)
+        priors = np.asarray(priors)
+
+        # Engagement per hour, decayed with age, on a log scale against the source's reference
+        velocity = engagement / np.power(ages + 2.0, GRAVITY)
+        engagement_norm = np.clip(np.log1p(velocity) / np.log1p(reference), 0.0, 1.0)
+
+        # Sources with no engagement numbers use their prior instead
+        engagement_norm = np.where(np.isnan(priors), engagement_norm, priors)
+
+        recency = np.power(0.5, ages / RECENCY_HALF_LIFE_HOURS)
+
+        return np.round(10.0 * (ENGAGEMENT_WEIGHT * engagement_norm + RECENCY_WEIGHT * recency), 2)
+
+
+_scorer = None
+
+
+def get_virality_scorer() -> ViralityScorer:
+    """Get the process-wide virality scorer so its cache is shared"""
+    global _scorer
+    if _scorer is None:
+        _scorer = ViralityScorer()
+    return _scorer